@@ -7,16 +7,32 @@ PaddlePaddle OCR v0.2.0 - 基于PaddleOCR 3.x优化版
 - 基于最新PaddleOCR 3.x API和最佳实践
 - 分离的模板和静态文件
 - 使用推荐的predict方法替代弃用的ocr方法
+
+生产环境请使用Gunicorn预加载部署（gunicorn -c gunicorn_conf.py app:app），
+worker通过写时复制共享主进程中已加载的模型；PaddlePaddle需要设置
+FLAGS_allocator_strategy=auto_growth，共享的内存页才不会被逐个复制。
 """
 
 import os
+import sys
+import atexit
 import logging
 import json
+import ctypes
+import functools
+import gc
+import hashlib
+import importlib.util
+import inspect
+import queue
+import tempfile
 import threading
 import time
-import tempfile
-import uuid
-from flask import Flask, request, jsonify, render_template, send_file, abort
+from collections import OrderedDict
+from itertools import count, zip_longest
+import cv2
+import numpy as np
+from flask import Flask, Request, request, jsonify, render_template, send_file, abort
 from flask_cors import CORS
 
 # 导入格式转换相关模块
@@ -26,6 +42,10 @@ from core.exceptions import (
     FileOperationError, APIError, RequestValidationError
 )
 
+# Paddle运行时参数需在首次导入paddle之前设置
+os.environ.setdefault('FLAGS_max_inplace_grad_add', '8')
+os.environ.setdefault('CPU_NUM', str(max(1, (os.cpu_count() or 2) // 2)))
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -37,12 +57,326 @@ ocr_service = None
 ocr_initializing = False
 ocr_init_error = None
 
+# 保护初始化状态的检查和初始化线程的启动，防止并发请求重复创建PaddleOCR实例
+_init_lock = threading.Lock()
+
+# check_paddle_available的缓存结果
+_PADDLE_OK = None
+# 后台预导入得到的PaddleOCR类，init_ocr_async优先使用
+_PaddleOCR_cls = None
+
+# /api/status中模型信息等静态字段的缓存（有效期内不重复扫描模型目录）
+STATUS_CACHE_TTL = 10
+_status_cache = {'t': 0, 'v': None}
+
 # 创建全局导出管理器实例
 export_manager = ExportManager()
 
+# 模型预热使用的输入尺寸(高, 宽)，覆盖检测模型常见的输入范围
+WARMUP_SHAPES = ((960, 960), (640, 480))
+
+# 请求级批处理配置：并发请求在MAX_LATENCY_MS内合并为一次predict调用
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '8'))
+MAX_LATENCY_MS = float(os.environ.get('MAX_LATENCY_MS', '20'))
+BATCH_WAIT_TIMEOUT = 120  # 单个请求等待批处理结果的最长时间（秒）
+
+# 推理精度：默认fp32；fp16可减少权重内存占用并提升CPU推理吞吐，但未验证识别准确率，
+# 需设置OCR_PRECISION=fp16显式启用，不被支持时回退到fp32
+OCR_PRECISION = os.environ.get('OCR_PRECISION', 'fp32')
+
+
+class _BatchItem:
+    """批处理队列中的单个OCR请求"""
+    
+    __slots__ = ('img', 'use_textline_orientation', 'event', 'result', 'error', 'cancelled', 'release')
+    
+    def __init__(self, img, use_textline_orientation, release=None):
+        self.img = img
+        self.use_textline_orientation = use_textline_orientation
+        self.release = release  # 批处理线程不再使用img后调用，用于归还img引用的资源
+        self.event = threading.Event()
+        self.result = []
+        self.error = None
+        self.cancelled = False  # 提交方等待超时后置为True，批处理线程不再识别该请求
+
+
+class _BatchQueue:
+    """将并发的OCR请求合并为一次ocr_service.predict批量调用"""
+    
+    _STOP = object()  # 放入队列后批处理线程处理完已收集的请求即退出
+    
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+    
+    def start(self):
+        """启动后台批处理线程（批大小不大于1时不启用）"""
+        if self.max_batch_size <= 1 or self.is_running():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def stop(self, timeout=None):
+        """停止后台批处理线程，等待当前批次识别完成"""
+        if not self.is_running():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def submit(self, img, use_textline_orientation=False, timeout=BATCH_WAIT_TIMEOUT, release=None):
+        """提交图片并等待识别结果，返回与单张predict相同格式的结果列表
+        
+        传入release时由批处理线程在识别结束或跳过该请求后调用，
+        等待超时返回时批处理线程可能仍在读取img，调用方不能自行释放
+        """
+        item = _BatchItem(img, use_textline_orientation, release)
+        self._queue.put(item)
+        if not item.event.wait(timeout):
+            item.cancelled = True
+            raise TimeoutError('等待OCR批处理结果超时')
+        if item.error is not None:
+            raise item.error
+        return item.result
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            items = [item]
+            # 队列中没有其他请求时立即识别，单个请求不必等待凑批；
+            # 有请求排队时（通常是上一批识别期间到达的）再在MAX_LATENCY_MS内继续收集
+            if not self._queue.empty():
+                deadline = time.monotonic() + self.max_latency
+                while len(items) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stopping = True
+                        break
+                    items.append(item)
+            
+            # 跳过提交方已等待超时的请求
+            for item in items:
+                if item.cancelled and item.release is not None:
+                    item.release()
+            items = [item for item in items if not item.cancelled]
+            if not items:
+                continue
+            
+            # 文字方向分类开关不同的请求分组调用predict
+            groups = {}
+            for item in items:
+                groups.setdefault(item.use_textline_orientation, []).append(item)
+            
+            for use_textline_orientation, group in groups.items():
+                try:
+                    results = list(ocr_service.predict(
+                        [item.img for item in group],
+                        use_textline_orientation=use_textline_orientation
+                    ))
+                    # 结果与请求按顺序一一对应，数量不一致时无法确定归属，整组按失败处理
+                    if len(results) != len(group):
+                        raise RuntimeError(
+                            f'批量识别返回{len(results)}个结果，与请求数{len(group)}不一致'
+                        )
+                    for item, page_result in zip(group, results):
+                        item.result = [page_result]
+                except Exception as e:
+                    for item in group:
+                        item.error = e
+                finally:
+                    for item in group:
+                        if item.release is not None:
+                            item.release()
+                        item.event.set()
+
+
+_batch_queue = _BatchQueue()
+
+# OCR结果缓存：按上传内容的BLAKE2b摘要缓存识别结果，重复上传直接返回
+_OCR_CACHE = OrderedDict()
+_OCR_CACHE_MAX = 512
+_ocr_cache_lock = threading.Lock()
+_ocr_cache_service = None  # 缓存所属的OCR服务实例，服务变化时缓存失效
+# 不超过该大小的上传文件在解析表单时完全保存在内存中，超过才落盘
+UPLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# 识别结果的置信度阈值，低于该值的文字行被丢弃
+CONF_THRESHOLD = 0.3
+
+# 每完成TRIM_INTERVAL次识别回收一次内存，抑制长时间运行时RSS持续增长
+TRIM_INTERVAL = 50
+_ocr_request_counter = count(1)
+
+# OCR_INPUT_FROM_FILE=1时将上传内容写入文件并按路径识别（供需要文件路径输入的推理后端使用），
+# 请求从进程内的临时文件池中借用文件、用完归还，避免每次请求创建和删除文件
+OCR_INPUT_FROM_FILE = os.environ.get('OCR_INPUT_FROM_FILE', '0') == '1'
+SCRATCH_POOL_SIZE = 8  # 池中最多保留的空闲临时文件数，超出的归还时直接删除
+_scratch_free = []  # 空闲的临时文件路径
+_scratch_paths = set()  # 当前存在的全部临时文件路径，进程退出时删除
+_scratch_lock = threading.Lock()
+
+
+def _get_cached_ocr_result(key):
+    """从OCR结果缓存中查找，命中时更新LRU顺序"""
+    global _ocr_cache_service
+    
+    with _ocr_cache_lock:
+        if _ocr_cache_service is not ocr_service:
+            _OCR_CACHE.clear()
+            _ocr_cache_service = ocr_service
+            return None
+        
+        cached = _OCR_CACHE.get(key)
+        if cached is not None:
+            _OCR_CACHE.move_to_end(key)
+        return cached
+
+
+def _read_upload(file):
+    """读出上传内容并计算BLAKE2b摘要
+    
+    上传内容已由_SpooledUploadRequest缓存在SpooledTemporaryFile中，一次读出即可，
+    不再分块复制到另一个BytesIO
+    
+    Returns:
+        tuple: (摘要bytes, 上传内容bytes)
+    """
+    data = file.stream.read()
+    return hashlib.blake2b(data, digest_size=16).digest(), data
+
+
+def _acquire_scratch_path():
+    """从临时文件池中借用一个文件路径，池为空时新建"""
+    with _scratch_lock:
+        if _scratch_free:
+            return _scratch_free.pop()
+    
+    fd, path = tempfile.mkstemp(suffix='.jpg')
+    os.close(fd)
+    with _scratch_lock:
+        _scratch_paths.add(path)
+    return path
+
+
+def _release_scratch_path(path):
+    """归还临时文件路径，池已满时删除该文件"""
+    with _scratch_lock:
+        if len(_scratch_free) < SCRATCH_POOL_SIZE:
+            _scratch_free.append(path)
+            return
+        _scratch_paths.discard(path)
+    
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+@atexit.register
+def _cleanup_scratch_files():
+    """进程退出时删除所有临时文件"""
+    for path in list(_scratch_paths):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _extract_lines(result):
+    """从PaddleOCR 3.x结果中提取置信度达标的文字行
+    
+    结果是字典列表，每页包含rec_texts和rec_scores
+    """
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    lines = []
+    for page_result in result:
+        if not isinstance(page_result, dict):
+            continue
+        
+        rec_texts = page_result.get('rec_texts', [])
+        rec_scores = page_result.get('rec_scores', [])
+        
+        if debug_enabled:
+            logging.debug("识别到 %d 行文字", len(rec_texts))
+            # 缺失的置信度按0.0显示；多余的置信度不参与配对
+            for text, confidence in zip_longest(rec_texts, rec_scores[:len(rec_texts)], fillvalue=0.0):
+                logging.debug("文字: '%s', 置信度: %.2f", text, confidence)
+        
+        # 降低置信度阈值，确保能识别到文字；缺少置信度的行视为0.0，zip截断即可将其过滤
+        lines.extend([
+            stripped for text, confidence in zip(rec_texts, rec_scores)
+            if confidence > CONF_THRESHOLD and (stripped := text.strip())
+        ])
+    return lines
+
+
+def _extract_lines_fallback(result):
+    """备用解析：尝试其他可能的结果格式（字符串列表或含文字字段的字典列表）"""
+    lines = []
+    if isinstance(result, list):
+        for item in result:
+            if isinstance(item, str) and item.strip():
+                lines.append(item.strip())
+            elif isinstance(item, dict):
+                # 查找可能的文字字段
+                for key in ['text', 'content', 'result']:
+                    if key in item and isinstance(item[key], str):
+                        lines.append(item[key].strip())
+    return lines
+
+
+def _maybe_trim_memory():
+    """每TRIM_INTERVAL次成功识别执行一次垃圾回收，并让glibc把空闲堆内存归还给系统"""
+    if next(_ocr_request_counter) % TRIM_INTERVAL:
+        return
+    
+    gc.collect()
+    if sys.platform.startswith('linux'):
+        try:
+            ctypes.CDLL('libc.so.6').malloc_trim(0)
+        except (OSError, AttributeError):
+            # 非glibc环境（如musl）没有malloc_trim
+            pass
+
+
+def _add_ocr_result_to_cache(key, response):
+    """添加OCR结果到缓存，超出容量时淘汰最久未使用的条目"""
+    with _ocr_cache_lock:
+        if _ocr_cache_service is not ocr_service:
+            return
+        _OCR_CACHE[key] = response
+        if len(_OCR_CACHE) > _OCR_CACHE_MAX:
+            _OCR_CACHE.popitem(last=False)
+
+class _SpooledUploadRequest(Request):
+    """上传文件使用SpooledTemporaryFile缓存的请求类
+    
+    Werkzeug默认超过500KB就把上传内容写入临时文件，常见的手机照片和扫描件
+    因此每次请求都要创建、写入并删除磁盘文件。提高阈值后常规图片只在内存中流转。
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, mode='rb+')
+
+
 def create_app():
     """创建Flask应用"""
     app = Flask(__name__)
+    app.request_class = _SpooledUploadRequest
     
     # 基础配置
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
@@ -52,15 +386,46 @@ def create_app():
     
     return app
 
-def check_paddle_available():
-    """检查PaddleOCR是否可用"""
+def start_paddle_preimport():
+    """在后台线程中预导入paddleocr，避免首次初始化OCR时在请求线程上承担数秒的导入开销
+    
+    只在之后不会再fork的进程中调用（开发服务器入口或gunicorn的post_fork）：
+    预加载应用的gunicorn主进程若在导入途中fork，worker会继承导入到一半的模块状态
+    """
+    threading.Thread(target=_preimport_paddle, daemon=True).start()
+
+def _preimport_paddle():
+    """模型已下载时预先导入paddleocr（paddle随之导入）"""
+    global _PaddleOCR_cls
+    
+    # 模型不在本地时保持延迟导入
+    if not can_init_ocr_immediately():
+        return
+    
     try:
-        import paddle
         from paddleocr import PaddleOCR
-        return True
     except ImportError as e:
-        logging.warning(f"PaddleOCR不可用: {e}")
-        return False
+        logging.warning(f"PaddleOCR预导入失败: {e}")
+        return
+    _PaddleOCR_cls = PaddleOCR
+    logging.info("PaddleOCR预导入完成")
+
+def check_paddle_available():
+    """检查PaddleOCR是否可用（结果在进程内不会改变，只检查一次）
+    
+    只查找模块是否已安装，不实际导入，避免仅为检查就加载paddle的大量动态库。
+    真正的导入在init_ocr_async中进行。
+    """
+    global _PADDLE_OK
+    
+    if _PADDLE_OK is not None:
+        return _PADDLE_OK
+    
+    _PADDLE_OK = (importlib.util.find_spec('paddle') is not None
+                  and importlib.util.find_spec('paddleocr') is not None)
+    if not _PADDLE_OK:
+        logging.warning("PaddleOCR不可用: 未安装paddlepaddle或paddleocr")
+    return _PADDLE_OK
 
 def get_file_size_mb(file_path):
     """获取文件大小（MB）"""
@@ -72,24 +437,49 @@ def get_file_size_mb(file_path):
     except Exception:
         return 0
 
+# 目录大小缓存有效期（秒）：模型目录在请求之间不会变化
+DIRECTORY_SIZE_TTL = 30
+
+def _walk_size(path):
+    """递归统计目录下文件总字节数，直接使用DirEntry缓存的类型和stat信息"""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _walk_size(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+@functools.lru_cache(maxsize=64)
+def _get_directory_size_mb_cached(dir_path, ttl_bucket):
+    """按(路径, 时间窗口)缓存目录大小，同一窗口内重复查询为O(1)"""
+    return round(_walk_size(dir_path) / (1024 * 1024), 2)
+
 def get_directory_size_mb(dir_path):
     """获取目录总大小（MB）"""
     try:
         if not os.path.exists(dir_path):
             return 0
         
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(dir_path):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(file_path)
-                except (OSError, IOError):
-                    continue
-        return round(total_size / (1024 * 1024), 2)
+        return _get_directory_size_mb_cached(dir_path, int(time.time() // DIRECTORY_SIZE_TTL))
     except Exception:
         return 0
 
+def _list_model_dirs(models_dir):
+    """列出模型目录下的子目录名
+    
+    使用os.scandir，目录项类型直接来自readdir结果，无需对每个条目再stat一次
+    """
+    with os.scandir(models_dir) as entries:
+        return [entry.name for entry in entries if entry.is_dir()]
+
 def get_model_info():
     """获取模型版本和大小信息"""
     models_info = []
@@ -104,7 +494,7 @@ def get_model_info():
         
         # 检查PaddleOCR 3.x的新模型存储位置
         if use_paddlex:
-            model_dirs = [d for d in os.listdir(paddlex_dir) if os.path.isdir(os.path.join(paddlex_dir, d))]
+            model_dirs = _list_model_dirs(paddlex_dir)
             
             # 确定当前使用的PaddleX模型（通常是mobile版本优先）
             current_models = []
@@ -183,9 +573,9 @@ def check_models_downloaded():
         
         # 检查PaddleOCR 3.x的新模型存储位置
         paddlex_dir = os.path.join(home_dir, ".paddlex", "official_models")
-        if os.path.exists(paddlex_dir):
+        if os.path.isdir(paddlex_dir):
             # 检查是否有任何模型文件
-            model_dirs = [d for d in os.listdir(paddlex_dir) if os.path.isdir(os.path.join(paddlex_dir, d))]
+            model_dirs = _list_model_dirs(paddlex_dir)
             if len(model_dirs) >= 3:  # 至少需要检测、识别、方向分类模型
                 logging.info(f"检测到PaddleOCR 3.x模型文件: {len(model_dirs)}个模型")
                 return True
@@ -224,12 +614,29 @@ def can_init_ocr_immediately():
     """检查是否可以立即初始化OCR（不需要下载）"""
     return check_paddle_available() and check_models_downloaded()
 
-def init_ocr_async():
-    """异步初始化OCR服务 - 基于PaddleOCR 3.2.0优化"""
+def warmup_ocr():
+    """模型预热 - MKLDNN按输入尺寸缓存Conv/GEMM原语，使用接近真实请求的尺寸预热，
+    将原语创建成本在预热阶段一次性付清，避免首个真实请求出现延迟尖峰"""
+    logging.info("正在进行模型预热...")
+    try:
+        for height, width in WARMUP_SHAPES:
+            _ = ocr_service.predict(np.zeros((height, width, 3), dtype=np.uint8))
+        logging.info("模型预热完成")
+    
+    except Exception as warmup_error:
+        logging.warning(f"模型预热失败，但不影响正常使用: {warmup_error}")
+
+
+def init_ocr_async(warmup=True):
+    """异步初始化OCR服务 - 基于PaddleOCR 3.2.0优化
+    
+    Args:
+        warmup: 是否在加载模型后预热并启动批处理线程。Gunicorn主进程只加载模型，
+            推理相关的线程池在fork后由各worker自行预热创建
+    """
     global ocr_service, ocr_initializing, ocr_init_error
     
     try:
-        ocr_initializing = True
         ocr_init_error = None
         
         logging.info("开始初始化OCR服务（PaddleOCR 3.x）...")
@@ -238,8 +645,10 @@ def init_ocr_async():
         if not check_paddle_available():
             raise ImportError("PaddleOCR未安装或版本不兼容")
         
-        # 导入必要模块
-        from paddleocr import PaddleOCR
+        # 导入必要模块（已预导入时直接复用）
+        PaddleOCR = _PaddleOCR_cls
+        if PaddleOCR is None:
+            from paddleocr import PaddleOCR
         import paddle
         
         # 强制使用CPU模式 - PaddleOCR 3.x推荐配置
@@ -247,32 +656,43 @@ def init_ocr_async():
         
         # 基于PaddleOCR 3.x版本的优化配置 - 使用轻量级模型
         ocr_config = {
-            'use_textline_orientation': True,  # 启用文字方向分类
+            # 加载文字方向分类模型；是否执行分类由每个请求的orient参数决定
+            'use_textline_orientation': True,
             # 使用轻量级移动端模型提高速度
             'text_detection_model_name': 'PP-OCRv4_mobile_det',
             'text_recognition_model_name': 'PP-OCRv4_mobile_rec',
+            # 限制MKLDNN线程数，同时约束其工作区内存
+            'cpu_threads': max(1, (os.cpu_count() or 2) // 2),
+            # 启用MKLDNN加速，并限制按输入尺寸缓存的原语数量
+            'enable_mkldnn': True,
+            'mkldnn_cache_capacity': 10,
         }
         
-        # 初始化OCR服务
-        logging.info("正在创建PaddleOCR实例...")
-        ocr_service = PaddleOCR(**ocr_config)
+        # 内存与吞吐的权衡：CPU上predictor.run()内部不会并行处理识别批次，
+        # 增大识别批大小几乎没有加速，却会让推理引擎在初始化时预分配大块内存。
+        # 因此将识别批大小固定为1（参数名随PaddleOCR版本不同）
+        ocr_params = inspect.signature(PaddleOCR.__init__).parameters
+        if 'text_recognition_batch_size' in ocr_params:
+            ocr_config['text_recognition_batch_size'] = 1
+        else:
+            ocr_config['rec_batch_num'] = 1
         
-        # 模型预热 - 使用小图片进行一次识别以加载模型到内存
-        logging.info("正在进行模型预热...")
+        # 初始化OCR服务
+        logging.info(f"正在创建PaddleOCR实例（精度: {OCR_PRECISION}）...")
         try:
-            import numpy as np
-            from PIL import Image
-            
-            # 创建一个小的测试图片进行预热
-            test_img = Image.new('RGB', (100, 50), color='white')
-            test_img_array = np.array(test_img)
-            
-            # 执行一次简单的OCR预热
-            _ = ocr_service.predict(test_img_array)
-            logging.info("模型预热完成")
+            ocr_service = PaddleOCR(precision=OCR_PRECISION, **ocr_config)
+        except (TypeError, ValueError) as precision_error:
+            if OCR_PRECISION == 'fp32':
+                raise
+            # 当前版本或CPU不支持该精度，使用相同配置回退到fp32；其他异常直接抛出
+            logging.warning(f"{OCR_PRECISION}精度初始化失败，回退到fp32: {precision_error}")
+            ocr_service = PaddleOCR(precision='fp32', **ocr_config)
+        
+        if warmup:
+            warmup_ocr()
             
-        except Exception as warmup_error:
-            logging.warning(f"模型预热失败，但不影响正常使用: {warmup_error}")
+            # 预热完成后启动请求级批处理线程
+            _batch_queue.start()
         
         logging.info("OCR服务初始化成功（PaddleOCR 3.x）")
         
@@ -282,6 +702,8 @@ def init_ocr_async():
         ocr_service = None
     finally:
         ocr_initializing = False
+        # 初始化可能下载了模型，使状态缓存失效
+        _status_cache['v'] = None
 
 # 创建应用
 app = create_app()
@@ -296,22 +718,28 @@ def api_status():
     """获取系统状态"""
     global ocr_service, ocr_initializing, ocr_init_error
     
-    paddle_available = check_paddle_available()
-    models_downloaded = check_models_downloaded()
-    can_init_immediately = can_init_ocr_immediately()
-    models_info = get_model_info()
+    now = time.monotonic()
+    static_status = _status_cache['v']
+    if static_status is None or now - _status_cache['t'] >= STATUS_CACHE_TTL:
+        paddle_available = check_paddle_available()
+        models_downloaded = check_models_downloaded()
+        static_status = {
+            'paddle_available': paddle_available,
+            'models_downloaded': models_downloaded,
+            'can_init_immediately': paddle_available and models_downloaded,
+            'version': 'PaddleOCR 3.x',
+            'models_info': get_model_info()
+        }
+        _status_cache['t'] = now
+        _status_cache['v'] = static_status
     
     return jsonify({
         'success': True,
         'data': {
-            'paddle_available': paddle_available,
-            'models_downloaded': models_downloaded,
-            'can_init_immediately': can_init_immediately,
+            **static_status,
             'ocr_ready': ocr_service is not None,
             'ocr_initializing': ocr_initializing,
             'ocr_error': ocr_init_error,
-            'version': 'PaddleOCR 3.x',
-            'models_info': models_info,
             'timestamp': time.time()
         }
     })
@@ -321,22 +749,26 @@ def init_ocr():
     """初始化OCR服务"""
     global ocr_initializing
     
-    if ocr_service:
-        return jsonify({
-            'success': True,
-            'message': 'OCR服务已经初始化'
-        })
-    
-    if ocr_initializing:
-        return jsonify({
-            'success': False,
-            'error': {'message': 'OCR服务正在初始化中'}
-        }), 409
-    
-    # 开始异步初始化
-    thread = threading.Thread(target=init_ocr_async)
-    thread.daemon = True
-    thread.start()
+    with _init_lock:
+        if ocr_service:
+            return jsonify({
+                'success': True,
+                'message': 'OCR服务已经初始化'
+            })
+        
+        if ocr_initializing:
+            return jsonify({
+                'success': False,
+                'error': {'message': 'OCR服务正在初始化中'}
+            }), 409
+        
+        # 在锁内标记为初始化中，保证只有一个请求能启动初始化线程
+        ocr_initializing = True
+        
+        # 开始异步初始化
+        thread = threading.Thread(target=init_ocr_async)
+        thread.daemon = True
+        thread.start()
     
     return jsonify({
         'success': True,
@@ -367,85 +799,103 @@ def process_ocr():
             'error': {'message': '文件名为空'}
         }), 400
     
+    # 是否执行文字方向分类：截图、已摆正的扫描件等无需分类，默认跳过以节省推理时间
+    use_textline_orientation = request.form.get('orient', '0') == '1'
+    
     # 初始化变量
     text_content = ""
     text_lines = []
-    temp_path = None
     
     try:
-        # 生成唯一的临时文件名
-        temp_filename = f"ocr_temp_{uuid.uuid4().hex}.jpg"
-        temp_path = os.path.join(tempfile.gettempdir(), temp_filename)
+        # 直接在内存中解码上传的图片，避免临时文件的写入、读取和清理
+        digest, data = _read_upload(file)
+        cache_key = (digest, use_textline_orientation)
         
-        # 保存文件
-        file.save(temp_path)
+        # 相同内容的上传直接返回缓存结果，跳过解码和识别
+        cached = _get_cached_ocr_result(cache_key)
+        if cached is not None:
+            logging.info(f"OCR缓存命中: {file.filename}")
+            return jsonify({
+                'success': True,
+                'data': {
+                    **cached,
+                    'process_time': 0.0,
+                    'available_formats': export_manager.get_supported_formats()
+                }
+            })
+        
+        if OCR_INPUT_FROM_FILE:
+            # 借用池中的临时文件，写入上传内容后由PaddleOCR按路径读取
+            img = _acquire_scratch_path()
+            try:
+                with open(img, 'wb') as f:
+                    f.write(data)
+            except Exception:
+                _release_scratch_path(img)
+                raise
+        else:
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                return jsonify({
+                    'success': False,
+                    'error': {'message': '无法解析上传的图片'}
+                }), 400
         
         # 执行OCR - 使用PaddleOCR 3.x推荐方式
         logging.info(f"开始处理图片: {file.filename}")
         start_time = time.time()
         
-        # PaddleOCR 3.x推荐的调用方式
-        result = ocr_service.predict(temp_path)
+        # PaddleOCR 3.x推荐的调用方式；批处理线程运行时与并发请求合并执行，
+        # 此时临时文件由批处理线程在识别结束后归还（等待超时时识别可能仍在读取该文件）
+        if _batch_queue.is_running():
+            release = functools.partial(_release_scratch_path, img) if OCR_INPUT_FROM_FILE else None
+            result = _batch_queue.submit(img, use_textline_orientation, release=release)
+        else:
+            try:
+                result = ocr_service.predict(img, use_textline_orientation=use_textline_orientation)
+            finally:
+                if OCR_INPUT_FROM_FILE:
+                    _release_scratch_path(img)
         
         process_time = time.time() - start_time
         logging.info(f"OCR处理完成，耗时: {process_time:.2f}秒")
         
-        # 调试：打印原始结果结构
-        logging.info(f"原始结果类型: {type(result)}")
-        logging.info(f"原始结果长度: {len(result) if result else 0}")
-        if result:
-            logging.info(f"结果示例: {str(result)[:200]}...")
+        # 调试：打印原始结果结构（仅在DEBUG级别下格式化，避免每次请求都对结果做str()）
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("原始结果类型: %s", type(result))
+            logging.debug("原始结果长度: %d", len(result) if result else 0)
+            if result:
+                logging.debug("结果示例: %.200s...", result)
         
-        # 提取文本 - 适配PaddleOCR 3.x的新返回格式
-        if result and len(result) > 0:
-            logging.info("开始解析识别结果...")
-            
+        # 提取文本 - 适配PaddleOCR 3.x的新返回格式，未解析到文字时才尝试备用格式
+        if result:
             try:
-                # PaddleOCR 3.x新格式: 结果是字典列表，包含rec_texts和rec_scores
-                for page_result in result:
-                    if isinstance(page_result, dict):
-                        # 获取识别的文字和置信度
-                        rec_texts = page_result.get('rec_texts', [])
-                        rec_scores = page_result.get('rec_scores', [])
-                        
-                        logging.info(f"识别到 {len(rec_texts)} 行文字")
-                        
-                        for i, text in enumerate(rec_texts):
-                            confidence = rec_scores[i] if i < len(rec_scores) else 0.0
-                            logging.info(f"文字: '{text}', 置信度: {confidence:.2f}")
-                            
-                            # 降低置信度阈值，确保能识别到文字
-                            if confidence > 0.3 and text.strip():
-                                text_lines.append(text.strip())
-                
-                if not text_lines:
-                    logging.warning("未找到符合条件的文字")
-                else:
-                    logging.info(f"成功解析 {len(text_lines)} 行文字")
-                        
+                text_lines = _extract_lines(result)
             except Exception as parse_error:
                 logging.error(f"结果解析失败: {parse_error}")
-                
-                # 备用解析：尝试其他可能的格式
+            
+            if not text_lines:
                 try:
-                    logging.info("尝试备用解析方式...")
-                    if isinstance(result, list):
-                        for item in result:
-                            if isinstance(item, str) and item.strip():
-                                text_lines.append(item.strip())
-                            elif isinstance(item, dict):
-                                # 查找可能的文字字段
-                                for key in ['text', 'content', 'result']:
-                                    if key in item and isinstance(item[key], str):
-                                        text_lines.append(item[key].strip())
+                    text_lines = _extract_lines_fallback(result)
                 except Exception as backup_error:
                     logging.error(f"备用解析也失败: {backup_error}")
+            
+            if not text_lines:
+                logging.warning("未找到符合条件的文字")
+            else:
+                logging.info(f"成功解析 {len(text_lines)} 行文字")
         
         else:
             logging.warning("OCR结果为空或无效")
         
         text_content = '\n'.join(text_lines)
         
+        _add_ocr_result_to_cache(cache_key, {
+            'text_content': text_content,
+            'line_count': len(text_lines)
+        })
+        _maybe_trim_memory()
+        
         return jsonify({
             'success': True,
             'data': {
@@ -462,14 +912,6 @@ def process_ocr():
             'success': False,
             'error': {'message': f'OCR处理失败: {str(e)}'}
         }), 500
-    
-    finally:
-        # 确保删除临时文件
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except Exception as cleanup_error:
-                logging.warning(f"清理临时文件失败: {cleanup_error}")
 
 @app.route('/api/convert-format', methods=['POST'])
 def convert_format():
@@ -764,4 +1206,6 @@ def health():
 if __name__ == '__main__':
     logging.info("启动PaddlePaddle OCR v0.2.0（基于PaddleOCR 3.x）...")
     logging.info("优化特性：快速启动、CPU模式、延迟初始化、使用最新API")
+    logging.info("当前为单进程开发服务器，生产环境请使用: gunicorn -c gunicorn_conf.py app:app")
+    start_paddle_preimport()
     app.run(host='127.0.0.1', port=5000, debug=False)
\ No newline at end of file
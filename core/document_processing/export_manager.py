@@ -5,30 +5,101 @@ from ..exceptions import (
     FormatConversionError, UnsupportedFormatError, TextAnalysisError,
     ValidationError, FileOperationError
 )
-from typing import Dict, List, Optional
+from typing import Dict, Hashable, List, Optional, Tuple
+from types import MappingProxyType
+from collections import OrderedDict
+from time import perf_counter_ns
+import time
+import threading
+import numpy as np
 import tempfile
 import os
-import datetime
+import hashlib
 import logging
 
+try:
+    import xxhash  # 可选：比hashlib更快的非加密哈希
+except ImportError:
+    xxhash = None
+
+
+# 进程内共享的默认分析器和格式转换器：多个ExportManager实例复用预编译的正则表达式和分析缓存
+_DEFAULT_ANALYZER = TextAnalyzer()
+_DEFAULT_FORMATTERS = {
+    'markdown': MarkdownFormatter(_DEFAULT_ANALYZER),
+    # 'html': HTMLFormatter(),  # 未来扩展
+    # 'pdf': PDFFormatter(),    # 未来扩展
+}
+
+# 导出格式对应的 (文件扩展名, MIME类型)，未知格式按纯文本处理
+_FORMAT_INFO = MappingProxyType({
+    'text': ('.txt', 'text/plain'),
+    'markdown': ('.md', 'text/markdown'),
+})
+_DEFAULT_FORMAT_INFO = ('.txt', 'text/plain')
+
+# 常见写法到规范格式名的映射，命中时无需lower()/strip()生成新字符串
+_FORMAT_NORMALIZE = {
+    'text': 'text', 'TEXT': 'text', 'Text': 'text',
+    'markdown': 'markdown', 'MARKDOWN': 'markdown', 'Markdown': 'markdown',
+}
+
+def _normalize_format(format_name: str) -> str:
+    """规范化格式名（小写并去除首尾空白）"""
+    return _FORMAT_NORMALIZE.get(format_name) or format_name.lower().strip()
+
+
+def _validate_str_inputs(value, field_name, format_value, format_field):
+    """校验输入内容和格式参数均为字符串
+    
+    Raises:
+        ValidationError: 当任一参数不是字符串时
+    """
+    if not isinstance(value, str):
+        raise ValidationError(f"{field_name.capitalize()} must be a string",
+                              field_name=field_name, field_value=type(value).__name__)
+    if not isinstance(format_value, str):
+        raise ValidationError(f"{format_field.replace('_', ' ').capitalize()} must be a string",
+                              field_name=format_field, field_value=type(format_value).__name__)
+
+
+# 性能监控保留的最近转换次数
+_PERF_WINDOW = 100
+
+# 按秒缓存的文件名时间戳 [秒, 格式化字符串]，同一秒内的多次导出复用格式化结果
+_ts_cache = [0, '']
+
 
 class ExportManager:
     """导出管理器 - 统一的导出接口"""
     
-    def __init__(self):
+    def __init__(self, analyzer: Optional[TextAnalyzer] = None,
+                 formatters: Optional[Dict[str, BaseFormatter]] = None):
+        """初始化导出管理器
+        
+        Args:
+            analyzer: 可选的文本分析器，默认使用进程内共享实例
+            formatters: 可选的格式转换器映射，默认使用进程内共享实例
+        """
         # 初始化文本分析器
-        self.analyzer = TextAnalyzer()
+        self.analyzer = analyzer or _DEFAULT_ANALYZER
         
-        # 初始化格式转换器，传入分析器实例
-        self.formatters = {
-            'markdown': MarkdownFormatter(self.analyzer),
-            # 'html': HTMLFormatter(),  # 未来扩展
-            # 'pdf': PDFFormatter(),    # 未来扩展
-        }
+        # 初始化格式转换器；自定义分析器时为其创建专用的转换器
+        if formatters is None:
+            if analyzer is None:
+                formatters = _DEFAULT_FORMATTERS
+            else:
+                formatters = {'markdown': MarkdownFormatter(self.analyzer)}
+        
+        # 复制映射，替换某个实例的转换器不会影响其他实例
+        self.formatters = dict(formatters)
         
-        # 格式转换结果缓存
-        self._conversion_cache = {}
+        # 格式转换结果缓存：缓存键 -> (转换后的内容, 结构分析信息)，按LRU顺序淘汰；
+        # 实例可被并发请求共享，查找、写入和命中统计都在锁内完成
+        self._conversion_cache = OrderedDict()
         self._cache_max_size = 50
+        self._small_text_key_limit = 512  # 短于该长度的文本直接作为缓存键
+        self._cache_lock = threading.Lock()
         self._cache_stats = {
             'hits': 0,
             'misses': 0,
@@ -37,11 +108,14 @@ class ExportManager:
         
         # 性能监控
         self._performance_monitor = {
-            'conversion_times': [],
             'large_text_threshold': 5000,  # 5KB
             'large_text_conversions': 0,
             'total_conversions': 0
         }
+        # 最近100次转换耗时（秒）的环形缓冲区：_perf_cursor为下一个写入位置，_perf_count为有效数量
+        self._perf_times = np.zeros(_PERF_WINDOW, dtype=np.float64)
+        self._perf_cursor = 0
+        self._perf_count = 0
     
     def convert_format(self, text: str, target_format: str) -> Dict:
         """转换文本格式（带缓存和性能监控）
@@ -65,26 +139,28 @@ class ExportManager:
             ValueError: 当目标格式不支持时
             TypeError: 当输入参数类型错误时
         """
-        import time
-        import hashlib
-        
-        start_time = time.time()
+        start_ns = perf_counter_ns()
         self._cache_stats['total_requests'] += 1
         self._performance_monitor['total_conversions'] += 1
         
-        # 输入验证
-        if not isinstance(text, str):
-            raise ValidationError("Text must be a string", field_name="text", field_value=type(text).__name__)
+        # 纯文本直通：格式已是规范的'text'时跳过输入校验和格式规范化
+        if target_format == 'text' and type(text) is str:
+            return {
+                'content': text,
+                'format': 'text',
+                'original_text': text,
+                'conversion_time': self._update_performance_stats(start_ns),
+                'cache_hit': False
+            }
         
-        if not isinstance(target_format, str):
-            raise ValidationError("Target format must be a string", field_name="target_format", field_value=type(target_format).__name__)
+        # 输入验证
+        _validate_str_inputs(text, 'text', target_format, 'target_format')
         
-        target_format = target_format.lower().strip()
+        target_format = _normalize_format(target_format)
         
         # 如果目标格式是纯文本，直接返回
         if target_format == 'text':
-            conversion_time = time.time() - start_time
-            self._update_performance_stats(conversion_time)
+            conversion_time = self._update_performance_stats(start_ns)
             return {
                 'content': text,
                 'format': 'text',
@@ -98,64 +174,34 @@ class ExportManager:
             supported_formats = ['text'] + list(self.formatters.keys())
             raise UnsupportedFormatError(target_format, supported_formats)
         
-        # 检查缓存
-        cache_key = self._generate_cache_key(text, target_format)
-        cached_result = self._get_from_cache(cache_key)
-        if cached_result:
-            self._cache_stats['hits'] += 1
-            conversion_time = time.time() - start_time
-            cached_result['conversion_time'] = conversion_time
-            cached_result['cache_hit'] = True
-            return cached_result
-        
-        self._cache_stats['misses'] += 1
-        
-        # 性能监控：检测大文本
-        if len(text) > self._performance_monitor['large_text_threshold']:
-            self._performance_monitor['large_text_conversions'] += 1
-        
         try:
-            # 获取格式转换器
-            formatter = self.formatters[target_format]
-            
-            # 执行格式转换
-            converted_content = formatter.convert(text)
+            # 执行格式转换（带缓存）：未命中时在锁外执行转换，避免长文本转换阻塞其他请求
+            cache_key = self._generate_cache_key(text, target_format)
+            cached = self._get_from_cache(cache_key)
+            cache_hit = cached is not None
+            if cache_hit:
+                converted_content, structure_info = cached
+            else:
+                converted_content, structure_info = self._do_convert(text, target_format)
+                self._add_to_cache(cache_key, (converted_content, structure_info))
             
-            # 如果是markdown格式，获取结构分析信息
-            structure_info = None
-            if target_format == 'markdown' and hasattr(formatter, 'analyzer'):
-                try:
-                    lines = text.split('\n')
-                    structure = formatter.analyzer.analyze_structure(lines)
-                    structure_info = {
-                        'headings_count': len(structure.headings),
-                        'paragraphs_count': len(structure.paragraphs),
-                        'lists_count': len(structure.lists),
-                        'tables_count': len(structure.tables) if structure.tables else 0
-                    }
-                except Exception:
-                    # 如果结构分析失败，不影响主要转换功能
-                    structure_info = None
+            # 性能监控：检测实际执行转换的大文本
+            if not cache_hit and len(text) > self._performance_monitor['large_text_threshold']:
+                self._performance_monitor['large_text_conversions'] += 1
             
-            conversion_time = time.time() - start_time
-            self._update_performance_stats(conversion_time)
+            conversion_time = self._update_performance_stats(start_ns)
             
+            # 每次调用构建新的结果字典，调用方修改结果不会影响缓存
             result = {
                 'content': converted_content,
                 'format': target_format,
                 'original_text': text,
                 'conversion_time': conversion_time,
-                'cache_hit': False
+                'cache_hit': cache_hit
             }
             
             if structure_info:
-                result['structure_info'] = structure_info
-            
-            # 缓存结果（不包含时间信息）
-            cache_result = result.copy()
-            cache_result.pop('conversion_time', None)
-            cache_result.pop('cache_hit', None)
-            self._add_to_cache(cache_key, cache_result)
+                result['structure_info'] = dict(structure_info)
             
             return result
             
@@ -164,8 +210,7 @@ class ExportManager:
             raise
         except Exception as e:
             # 转换失败时的错误处理
-            conversion_time = time.time() - start_time
-            self._update_performance_stats(conversion_time)
+            conversion_time = self._update_performance_stats(start_ns)
             
             # 记录错误
             logging.error(f"Format conversion failed: {e}")
@@ -186,6 +231,51 @@ class ExportManager:
             
             return fallback_result
     
+    def convert_to_text(self, text: str) -> Dict:
+        """转换为纯文本（原样返回），供已知目标格式为纯文本的调用方使用
+        
+        Args:
+            text: 原始文本
+        
+        Returns:
+            Dict: 与convert_format相同结构的结果字典
+        """
+        return self.convert_format(text, 'text')
+    
+    def _do_convert(self, text: str, target_format: str) -> Tuple[str, Optional[Dict]]:
+        """执行格式转换（纯函数，结果由convert_format缓存）
+        
+        Args:
+            text: 要转换的原始文本
+            target_format: 目标格式（已规范化且受支持）
+        
+        Returns:
+            Tuple[str, Optional[Dict]]: (转换后的内容, 结构分析信息)
+        """
+        # 获取格式转换器
+        formatter = self.formatters[target_format]
+        
+        # 执行格式转换
+        converted_content = formatter.convert(text)
+        
+        # 如果是markdown格式，获取结构分析信息
+        structure_info = None
+        if target_format == 'markdown' and hasattr(formatter, 'analyzer'):
+            try:
+                lines = text.split('\n')
+                structure = formatter.analyzer.analyze_structure(lines)
+                structure_info = {
+                    'headings_count': len(structure.headings),
+                    'paragraphs_count': len(structure.paragraphs),
+                    'lists_count': len(structure.lists),
+                    'tables_count': len(structure.tables) if structure.tables else 0
+                }
+            except Exception:
+                # 如果结构分析失败，不影响主要转换功能
+                structure_info = None
+        
+        return converted_content, structure_info
+    
     def get_supported_formats(self) -> List[str]:
         """获取支持的格式列表
         
@@ -206,8 +296,9 @@ class ExportManager:
         if not isinstance(format_name, str):
             return False
         
-        format_name = format_name.lower().strip()
-        return format_name in self.get_supported_formats()
+        format_name = _normalize_format(format_name)
+        # 直接查询格式转换器映射，不必每次构建完整的格式列表
+        return format_name == 'text' or format_name in self.formatters
     
     def validate_conversion_request(self, text: str, target_format: str) -> Dict:
         """验证转换请求的有效性
@@ -237,7 +328,8 @@ class ExportManager:
         if not isinstance(target_format, str):
             errors.append("Target format must be a string")
         elif not self.is_format_supported(target_format):
-            supported = ', '.join(self.get_supported_formats())
+            # 仅在出错时构建一次支持格式列表用于错误信息
+            supported = ', '.join(('text', *self.formatters))
             errors.append(f"Unsupported format '{target_format}'. Supported formats: {supported}")
         
         # 检查文本长度
@@ -273,13 +365,9 @@ class ExportManager:
             OSError: 当文件创建失败时
         """
         # 输入验证
-        if not isinstance(content, str):
-            raise ValidationError("Content must be a string", field_name="content", field_value=type(content).__name__)
-        
-        if not isinstance(format_type, str):
-            raise ValidationError("Format type must be a string", field_name="format_type", field_value=type(format_type).__name__)
+        _validate_str_inputs(content, 'content', format_type, 'format_type')
         
-        format_type = format_type.lower().strip()
+        format_type = _normalize_format(format_type)
         
         # 检查格式是否支持
         if not self.is_format_supported(format_type):
@@ -294,18 +382,24 @@ class ExportManager:
                 filename = self._ensure_file_extension(filename, format_type)
             
             # 获取文件扩展名和MIME类型
-            file_extension, content_type = self._get_file_info(format_type)
+            file_extension, content_type = _FORMAT_INFO.get(format_type, _DEFAULT_FORMAT_INFO)
             
             # 创建临时文件
             temp_dir = tempfile.gettempdir()
             filepath = os.path.join(temp_dir, filename)
             
-            # 写入文件内容
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 一次性编码后直接写入文件描述符，避免文本模式逐块编码；文件大小即字节数，无需再stat
+            data = content.encode('utf-8')
+            fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+            finally:
+                os.close(fd)
             
-            # 获取文件大小
-            file_size = os.path.getsize(filepath)
+            file_size = len(data)
             
             return {
                 'filepath': filepath,
@@ -339,8 +433,11 @@ class ExportManager:
         Returns:
             str: 生成的文件名
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension, _ = self._get_file_info(format_type)
+        sec = time.time_ns() // 1_000_000_000
+        if _ts_cache[0] != sec:
+            _ts_cache[:] = [sec, time.strftime("%Y%m%d_%H%M%S", time.localtime(sec))]
+        timestamp = _ts_cache[1]
+        file_extension = _FORMAT_INFO.get(format_type, _DEFAULT_FORMAT_INFO)[0]
         return f"ocr_result_{timestamp}{file_extension}"
     
     def _ensure_file_extension(self, filename: str, format_type: str) -> str:
@@ -353,7 +450,7 @@ class ExportManager:
         Returns:
             str: 带有正确扩展名的文件名
         """
-        file_extension, _ = self._get_file_info(format_type)
+        file_extension = _FORMAT_INFO.get(format_type, _DEFAULT_FORMAT_INFO)[0]
         
         # 移除现有扩展名（如果有）
         name_without_ext = os.path.splitext(filename)[0]
@@ -369,12 +466,7 @@ class ExportManager:
         Returns:
             tuple: (文件扩展名, MIME类型)
         """
-        format_info = {
-            'text': ('.txt', 'text/plain'),
-            'markdown': ('.md', 'text/markdown')
-        }
-        
-        return format_info.get(format_type, ('.txt', 'text/plain'))
+        return _FORMAT_INFO.get(format_type, _DEFAULT_FORMAT_INFO)
     
     def cleanup_download_file(self, filepath: str) -> bool:
         """清理下载文件
@@ -428,62 +520,101 @@ class ExportManager:
         }
     
     # 缓存和性能监控方法
-    def _generate_cache_key(self, text: str, target_format: str) -> str:
-        """生成缓存键"""
-        import hashlib
-        content = f"{text}:{target_format}"
-        return hashlib.md5(content.encode()).hexdigest()
+    def _generate_cache_key(self, text: str, target_format: str) -> Hashable:
+        """生成缓存键
+        
+        短文本直接以(格式, 文本)元组为键，str的哈希值会缓存在对象上，比计算摘要更快；
+        长文本优先使用xxh3_128，未安装xxhash时回退到blake2b，返回128位整数，
+        字典查找时无需再对十六进制字符串计算哈希
+        """
+        if len(text) < self._small_text_key_limit:
+            return (target_format, text)
+        
+        if xxhash is not None:
+            hasher = xxhash.xxh3_128()
+        else:
+            hasher = hashlib.blake2b(digest_size=16)
+        
+        hasher.update(target_format.encode())
+        hasher.update(b'\x00')
+        hasher.update(text.encode('utf-8'))
+        
+        if xxhash is not None:
+            return hasher.intdigest()
+        return int.from_bytes(hasher.digest(), 'big')
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Dict]:
-        """从缓存获取结果"""
-        return self._conversion_cache.get(cache_key)
+    def _get_from_cache(self, cache_key: Hashable) -> Optional[Tuple[str, Optional[Dict]]]:
+        """从转换缓存中查找并记录命中统计，命中时更新LRU顺序"""
+        with self._cache_lock:
+            cached = self._conversion_cache.get(cache_key)
+            if cached is not None:
+                self._conversion_cache.move_to_end(cache_key)
+                self._cache_stats['hits'] += 1
+            else:
+                self._cache_stats['misses'] += 1
+            return cached
     
-    def _add_to_cache(self, cache_key: str, result: Dict):
-        """添加结果到缓存"""
-        if len(self._conversion_cache) >= self._cache_max_size:
-            # 简单的LRU：删除最旧的条目
-            oldest_key = next(iter(self._conversion_cache))
-            del self._conversion_cache[oldest_key]
-        
-        self._conversion_cache[cache_key] = result
+    def _add_to_cache(self, cache_key: Hashable, value: Tuple[str, Optional[Dict]]):
+        """添加转换结果到缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self._conversion_cache[cache_key] = value
+            self._conversion_cache.move_to_end(cache_key)
+            while len(self._conversion_cache) > self._cache_max_size:
+                self._conversion_cache.popitem(last=False)
     
-    def _update_performance_stats(self, conversion_time: float):
-        """更新性能统计"""
-        self._performance_monitor['conversion_times'].append(conversion_time)
+    def _update_performance_stats(self, start_ns: int) -> float:
+        """记录自start_ns起的转换耗时（环形缓冲区只保留最近100次）
         
-        # 保持最近100次转换的记录
-        if len(self._performance_monitor['conversion_times']) > 100:
-            self._performance_monitor['conversion_times'].pop(0)
+        Returns:
+            float: 转换耗时（秒）
+        """
+        elapsed = (perf_counter_ns() - start_ns) / 1e9
+        cursor = self._perf_cursor
+        self._perf_times[cursor] = elapsed
+        self._perf_cursor = (cursor + 1) % _PERF_WINDOW
+        if self._perf_count < _PERF_WINDOW:
+            self._perf_count += 1
+        return elapsed
     
     def get_cache_stats(self) -> Dict:
         """获取缓存统计信息"""
-        stats = self._cache_stats.copy()
-        if stats['total_requests'] > 0:
-            stats['hit_rate'] = stats['hits'] / stats['total_requests']
-        else:
-            stats['hit_rate'] = 0.0
-        
-        stats['cache_size'] = len(self._conversion_cache)
-        stats['max_cache_size'] = self._cache_max_size
-        return stats
+        with self._cache_lock:
+            total_requests = self._cache_stats['total_requests']
+            hits = self._cache_stats['hits']
+            return {
+                'total_requests': total_requests,
+                'hits': hits,
+                'misses': self._cache_stats['misses'],
+                'hit_rate': hits / total_requests if total_requests > 0 else 0.0,
+                'cache_size': len(self._conversion_cache),
+                'max_cache_size': self._cache_max_size,
+            }
     
     def get_performance_stats(self) -> Dict:
         """获取性能统计信息"""
-        stats = self._performance_monitor.copy()
-        
-        if stats['conversion_times']:
-            stats['average_conversion_time'] = sum(stats['conversion_times']) / len(stats['conversion_times'])
-            stats['max_conversion_time'] = max(stats['conversion_times'])
-            stats['min_conversion_time'] = min(stats['conversion_times'])
-        else:
-            stats['average_conversion_time'] = 0.0
-            stats['max_conversion_time'] = 0.0
-            stats['min_conversion_time'] = 0.0
-        
-        if stats['total_conversions'] > 0:
-            stats['large_text_ratio'] = stats['large_text_conversions'] / stats['total_conversions']
+        monitor = self._performance_monitor
+        count = self._perf_count
+        cursor = self._perf_cursor
+        # 统计量与顺序无关，直接在有效区间的视图上做归约，不复制数据
+        times = self._perf_times[:count]
+        if count < _PERF_WINDOW:
+            conversion_times = times.tolist()
         else:
-            stats['large_text_ratio'] = 0.0
+            # 缓冲区已写满时按时间顺序展开
+            conversion_times = times[cursor:].tolist() + times[:cursor].tolist()
+        
+        total_conversions = monitor['total_conversions']
+        stats = {
+            'large_text_threshold': monitor['large_text_threshold'],
+            'large_text_conversions': monitor['large_text_conversions'],
+            'total_conversions': total_conversions,
+            'conversion_times': conversion_times,
+            'average_conversion_time': float(times.mean()) if count else 0.0,
+            'max_conversion_time': float(times.max()) if count else 0.0,
+            'min_conversion_time': float(times.min()) if count else 0.0,
+            'large_text_ratio': (monitor['large_text_conversions'] / total_conversions
+                                 if total_conversions > 0 else 0.0),
+        }
         
         # 添加分析器性能统计
         if hasattr(self.analyzer, 'get_performance_stats'):
@@ -493,21 +624,24 @@ class ExportManager:
     
     def clear_cache(self):
         """清空缓存"""
-        self._conversion_cache.clear()
-        self._cache_stats = {
-            'hits': 0,
-            'misses': 0,
-            'total_requests': 0
-        }
+        with self._cache_lock:
+            self._conversion_cache.clear()
+            self._cache_stats = {
+                'hits': 0,
+                'misses': 0,
+                'total_requests': 0
+            }
     
     def reset_performance_stats(self):
         """重置性能统计"""
         self._performance_monitor = {
-            'conversion_times': [],
             'large_text_threshold': 5000,
             'large_text_conversions': 0,
             'total_conversions': 0
         }
+        self._perf_times.fill(0.0)
+        self._perf_cursor = 0
+        self._perf_count = 0
         
         if hasattr(self.analyzer, 'reset_performance_stats'):
             self.analyzer.reset_performance_stats()
@@ -517,9 +651,9 @@ class ExportManager:
         if new_size < 1:
             raise ValueError("Cache size must be at least 1")
         
-        self._cache_max_size = new_size
-        
-        # 如果当前缓存超过新大小，删除最旧的条目
-        while len(self._conversion_cache) > new_size:
-            oldest_key = next(iter(self._conversion_cache))
-            del self._conversion_cache[oldest_key]
\ No newline at end of file
+        with self._cache_lock:
+            self._cache_max_size = new_size
+            
+            # 如果当前缓存超过新大小，淘汰最久未使用的条目
+            while len(self._conversion_cache) > new_size:
+                self._conversion_cache.popitem(last=False)
\ No newline at end of file
@@ -1,6 +1,67 @@
 """文本结构分析器模块"""
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass
+from collections import OrderedDict
+from time import perf_counter_ns
+import threading
+import re
+
+
+# 标题层级关键词：先判断二级关键词，未命中再判断一级关键词
+_LEVEL2_KEYWORD_PATTERN = re.compile('概述|总结|介绍')
+_LEVEL1_KEYWORD_PATTERN = re.compile('部分|章节')
+
+# 句末标点和列表项目符号前缀，供各处startswith/endswith共用
+_SENTENCE_END_PUNCTUATION = ('。', '！', '？')
+_LIST_BULLET_PREFIXES = ('-', '•', '*')
+_CHINESE_ORDINAL_PREFIXES = tuple(f'第{num}' for num in '一二三四五六七八九十')
+
+# 列表项可能的首字符（十进制数字另用str.isdecimal判断，与正则中的\d一致）；
+# 首字符不在其中的行不可能是列表项，无需进入正则匹配
+_LIST_MARKER_FIRST_CHARS = frozenset(
+    '-•*·○一二三四五六七八九十ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+)
+
+# 标题编号模式按优先级排列，对应的(层级, 置信度)和候选评分
+_HEADING_PATTERN_ORDER = ('chapter', 'section', 'numbered_section', 'numbered_main')
+_HEADING_PATTERN_LEVELS = {
+    'chapter': (1, 0.9),
+    'section': (2, 0.8),
+    'numbered_section': (2, 0.8),
+    'numbered_main': (1, 0.8),
+}
+_HEADING_PATTERN_SCORES = {
+    'chapter': 0.6,
+    'section': 0.6,
+    'numbered_section': 0.4,
+    'numbered_main': 0.4,
+}
+_UNCLASSIFIED = object()
+
+
+def _build_heading_candidate_table() -> Dict[tuple, bool]:
+    """预先计算标题候选判断表
+    
+    键为 (编号模式, 是否含关键词, 长度分档, 是否无句末标点)，长度分档 0: <=20, 1: <=40, 2: >40。
+    按原评分规则以相同的加法顺序累加，保证阈值比较结果与逐项计算一致。
+    """
+    table = {}
+    for pattern in (None,) + _HEADING_PATTERN_ORDER:
+        for has_keyword in (False, True):
+            for length_bucket, length_score in enumerate((0.3, 0.1, 0)):
+                for no_terminal in (False, True):
+                    score = _HEADING_PATTERN_SCORES.get(pattern, 0)
+                    if has_keyword:
+                        score += 0.3
+                    if length_score:
+                        score += length_score
+                    if no_terminal:
+                        score += 0.2
+                    table[pattern, has_keyword, length_bucket, no_terminal] = score >= 0.5
+    return table
+
+
+_HEADING_CANDIDATE_TABLE = _build_heading_candidate_table()
 
 
 @dataclass
@@ -48,21 +109,18 @@ class TextAnalyzer:
         self.min_heading_length = 2
         self.max_heading_length = 100
         self.heading_indicators = ['第', '章', '节', '部分', '概述', '总结', '介绍', '说明']
+        # 关键词合并为一个交替模式，一次扫描代替逐个关键词的子串查找
+        self._heading_indicator_pattern = re.compile('|'.join(map(re.escape, self.heading_indicators)))
         
         # 性能优化：预编译正则表达式
-        import re
         self._compiled_patterns = {
-            'unordered_list': [
-                re.compile(r'^[-•*]\s+(.+)'),
-                re.compile(r'^[·]\s+(.+)'),
-                re.compile(r'^[○]\s+(.+)'),
-            ],
-            'ordered_list': [
-                re.compile(r'^(\d+)[\.\)]\s+(.+)'),
-                re.compile(r'^([一二三四五六七八九十]+)[\.\)]\s+(.+)'),
-                re.compile(r'^([ABCDEFGHIJKLMNOPQRSTUVWXYZ])[\.\)]\s+(.+)'),
-                re.compile(r'^([abcdefghijklmnopqrstuvwxyz])[\.\)]\s+(.+)'),
-            ],
+            # 无序/有序列表合并为一个交替模式，每行只需匹配一次；
+            # 各分支首字符互不相交，匹配结果与逐个模式依次尝试一致
+            'list_item': re.compile(
+                r'^(?:(?P<bullet>[-•*·○])\s+(?P<bullet_text>.+)'
+                r'|(?P<number>\d+|[一二三四五六七八九十]+|[ABCDEFGHIJKLMNOPQRSTUVWXYZ]|[abcdefghijklmnopqrstuvwxyz])'
+                r'[\.\)]\s+(?P<number_text>.+))'
+            ),
             'heading_patterns': {
                 'chapter': re.compile(r'^第[一二三四五六七八九十]+章'),
                 'section': re.compile(r'^第[一二三四五六七八九十]+节'),
@@ -79,10 +137,18 @@ class TextAnalyzer:
                 'escape_links': re.compile(r'\[([^\]]*)\]\(([^)]*)\)'),
             }
         }
+        # 按优先级合并标题编号模式为一个带命名分组的交替模式，match一次后由lastgroup得到模式名
+        heading_patterns = self._compiled_patterns['heading_patterns']
+        alternatives = '|'.join(
+            f"(?P<{name}>{heading_patterns[name].pattern.lstrip('^')})" for name in _HEADING_PATTERN_ORDER
+        )
+        self._heading_number_pattern = re.compile(f'^(?:{alternatives})')
         
-        # 性能优化：缓存机制
-        self._analysis_cache = {}
+        # 性能优化：缓存机制，以文本行元组为键的LRU缓存；
+        # 共享的分析器被并发请求使用，查找、写入和命中统计都在锁内完成
+        self._analysis_cache = OrderedDict()
         self._cache_max_size = 100
+        self._cache_lock = threading.Lock()
         
         # 性能监控
         self._performance_stats = {
@@ -94,10 +160,7 @@ class TextAnalyzer:
     
     def analyze_structure(self, text_lines: List[str]) -> TextStructure:
         """分析文本结构，识别标题、段落、列表等"""
-        import time
-        import hashlib
-        
-        start_time = time.time()
+        start_ns = perf_counter_ns()
         self._performance_stats['total_analyses'] += 1
         
         if not text_lines:
@@ -109,11 +172,15 @@ class TextAnalyzer:
                 raw_lines=[]
             )
         
-        # 性能优化：检查缓存
-        text_hash = hashlib.md5('\n'.join(text_lines).encode()).hexdigest()
-        if text_hash in self._analysis_cache:
-            self._performance_stats['cache_hits'] += 1
-            return self._analysis_cache[text_hash]
+        # 性能优化：检查缓存（以行元组为键，无需拼接文本；行内含换行符的输入也不会与其他输入混淆）。
+        # ExportManager对同一文本会先后经转换和结构统计两次分析，第二次直接命中
+        cache_key = tuple(text_lines)
+        with self._cache_lock:
+            cached = self._analysis_cache.get(cache_key)
+            if cached is not None:
+                self._analysis_cache.move_to_end(cache_key)
+                self._performance_stats['cache_hits'] += 1
+                return cached
         
         # 性能监控：检测大文本
         total_chars = sum(len(line) for line in text_lines)
@@ -123,13 +190,10 @@ class TextAnalyzer:
         # 预处理文本行（优化版本）
         processed_lines = self._preprocess_lines_optimized(text_lines)
         
-        # 检测各种结构元素（并行处理小批量）
-        headings = self._convert_heading_dicts_to_objects(
-            self.detect_headings_optimized(processed_lines)
-        )
-        lists = self._convert_list_dicts_to_objects(
-            self.detect_lists_optimized(processed_lines)
-        )
+        # 检测各种结构元素（一次遍历同时得到标题和列表）
+        heading_dicts, list_dicts = self._detect_structures(processed_lines)
+        headings = self._convert_heading_dicts_to_objects(heading_dicts)
+        lists = self._convert_list_dicts_to_objects(list_dicts)
         
         # 提取段落（非标题、非列表的行）
         paragraphs = self._extract_paragraphs_optimized(processed_lines, headings, lists)
@@ -143,10 +207,10 @@ class TextAnalyzer:
         )
         
         # 更新缓存
-        self._update_cache(text_hash, result)
+        self._update_cache(cache_key, result)
         
         # 更新性能统计
-        analysis_time = time.time() - start_time
+        analysis_time = (perf_counter_ns() - start_ns) / 1e9
         self._update_performance_stats(analysis_time)
         
         return result
@@ -250,10 +314,12 @@ class TextAnalyzer:
         
         return list_items
     
+    def is_list_item(self, line: str) -> bool:
+        """判断单行文本是否为列表项"""
+        return self._analyze_list_item_optimized(line.strip(), 0) is not None
+    
     def _analyze_list_item(self, line: str, line_number: int) -> Dict:
         """分析单行是否为列表项"""
-        import re
-        
         if not line or not line.strip():
             return None
         
@@ -308,6 +374,10 @@ class TextAnalyzer:
     
     def _calculate_list_indentation(self, line: str) -> int:
         """计算列表项的缩进层级"""
+        # 快速路径：预处理后的行已去除首尾空白，没有前导空白时无需切片和计数
+        if not line[:1].isspace():
+            return 0
+        
         # 计算前导空格数量
         leading_spaces = len(line) - len(line.lstrip())
         
@@ -320,30 +390,30 @@ class TextAnalyzer:
         
         return max(0, level)
     
-    def _adjust_list_nesting(self, list_items: List[Dict]) -> List[Dict]:
-        """调整列表嵌套层级"""
+    def _adjust_list_nesting(self, list_items: List[Dict], min_level: Optional[int] = None) -> List[Dict]:
+        """调整列表嵌套层级
+        
+        Args:
+            list_items: 列表项字典列表
+            min_level: 调用方在收集列表项时已统计的最小层级，省略时现场计算
+        """
         if not list_items:
             return list_items
         
-        # 标准化层级（确保从0开始）
-        min_level = min(item['level'] for item in list_items)
-        for item in list_items:
-            item['level'] = item['level'] - min_level
+        if min_level is None:
+            min_level = min(item['level'] for item in list_items)
         
-        # 检测连续的列表项并调整层级
-        for i in range(1, len(list_items)):
-            current = list_items[i]
-            previous = list_items[i-1]
+        # 单次遍历：先标准化当前项层级（确保从0开始），再参照已处理的前一项调整嵌套
+        previous = None
+        for current in list_items:
+            current['level'] -= min_level
             
-            # 如果当前项的行号与前一项不连续，可能是新的列表组
-            if current['line_number'] - previous['line_number'] > 2:
-                # 重置层级计算
-                continue
-            
-            # 基于内容长度和位置微调层级
-            if len(current['text']) < len(previous['text']) * 0.5:
-                # 较短的项可能是子项
-                current['level'] = max(current['level'], previous['level'] + 1)
+            # 如果当前项的行号与前一项不连续，可能是新的列表组，不做调整
+            if previous is not None and current['line_number'] - previous['line_number'] <= 2:
+                # 基于内容长度和位置微调层级：较短的项可能是子项
+                if len(current['text']) < len(previous['text']) * 0.5:
+                    current['level'] = max(current['level'], previous['level'] + 1)
+            previous = current
         
         return list_items
     
@@ -359,7 +429,7 @@ class TextAnalyzer:
             return False
         
         # 排除明显的列表项
-        if line.startswith(('-', '•', '*')) or line.startswith('- '):
+        if line.startswith(_LIST_BULLET_PREFIXES):
             return False
         
         # 排除过长的句子（通常是段落）
@@ -406,30 +476,24 @@ class TextAnalyzer:
     
     def _get_heading_features(self, line: str) -> Dict:
         """获取标题特征"""
-        import re
-        
-        # 中文数字映射
-        chinese_numbers = ['一', '二', '三', '四', '五', '六', '七', '八', '九', '十']
-        
+        patterns = self._compiled_patterns['heading_patterns']
         features = {
-            'contains_keywords': any(keyword in line for keyword in self.heading_indicators),
-            'starts_with_number': bool(re.match(r'^\d+[\.\s]', line)),
-            'starts_with_chinese_number': any(line.startswith(f'第{num}') for num in chinese_numbers),
-            'has_chapter_markers': bool(re.search(r'第[一二三四五六七八九十]+[章节]', line)),
-            'has_title_markers': bool(re.search(r'[第章节部分]|^\d+[\.\s]|^[一二三四五六七八九十]+[\.\s]', line)),
-            'ends_with_punctuation': line.endswith(('。', '！', '？')),
+            'contains_keywords': self._heading_indicator_pattern.search(line) is not None,
+            'starts_with_number': patterns['numeric_start'].match(line) is not None,
+            'starts_with_chinese_number': line.startswith(_CHINESE_ORDINAL_PREFIXES),
+            'has_chapter_markers': patterns['chapter_section'].search(line) is not None,
+            'has_title_markers': patterns['title_markers'].search(line) is not None,
+            'ends_with_punctuation': line.endswith(_SENTENCE_END_PUNCTUATION),
             'has_colon': '：' in line or ':' in line,
             'is_all_caps': line.isupper() if line.isascii() else False,
             'word_count': len(line.split()),
-            'is_list_item': line.startswith(('-', '•', '*', '- ')) or bool(re.match(r'^[•\-\*]\s', line))
+            'is_list_item': line.startswith(_LIST_BULLET_PREFIXES)
         }
         
         return features
     
     def _determine_heading_level(self, line: str, line_number: int, all_lines: List[str]) -> tuple:
         """确定标题层级和置信度"""
-        import re
-        
         level = 1
         confidence = 0.5
         
@@ -446,10 +510,10 @@ class TextAnalyzer:
         elif re.match(r'^\d+\.', line):  # 如 "1."
             level = 1
             confidence = 0.8
-        elif any(keyword in line for keyword in ['概述', '总结', '介绍']):
+        elif _LEVEL2_KEYWORD_PATTERN.search(line):
             level = 2
             confidence = 0.7
-        elif any(keyword in line for keyword in ['部分', '章节']):
+        elif _LEVEL1_KEYWORD_PATTERN.search(line):
             level = 1
             confidence = 0.7
         
@@ -473,7 +537,6 @@ class TextAnalyzer:
     
     def _normalize_text(self, text: str) -> str:
         """标准化文本，去除多余空格和特殊字符"""
-        import re
         # 去除多余空格
         text = re.sub(r'\s+', ' ', text.strip())
         return text
@@ -491,24 +554,64 @@ class TextAnalyzer:
             'has_punctuation': any(char in line for char in '。！？：；'),
             'is_short': len(line) < 20,
             'is_numeric_start': line[0].isdigit() if line else False,
-            'contains_keywords': any(keyword in line for keyword in self.heading_indicators)
+            'contains_keywords': self._heading_indicator_pattern.search(line) is not None
         }
     
     # 性能优化方法
     def _preprocess_lines_optimized(self, lines: List[str]) -> List[str]:
         """优化版本的预处理文本行"""
-        # 使用列表推导式提高性能
-        return [line.strip() for line in lines if line.strip()]
+        # 使用列表推导式提高性能，每行只strip一次
+        return [stripped for line in lines if (stripped := line.strip())]
     
     def detect_headings_optimized(self, lines: List[str]) -> List[Dict]:
-        """优化版本的标题检测"""
+        """优化版本的标题检测（lines为_preprocess_lines_optimized预处理后的行）"""
+        return self._detect_structures(lines)[0]
+    
+    def detect_lists_optimized(self, lines: List[str]) -> List[Dict]:
+        """优化版本的列表检测（lines为_preprocess_lines_optimized预处理后的行）"""
+        return self._detect_structures(lines)[1]
+    
+    def _detect_structures(self, lines: List[str]) -> tuple:
+        """一次遍历同时检测标题和列表项
+        
+        同一行可以既是标题又是列表项（如"1. 概述"），两种判断相互独立。
+        lines须为预处理后的行（已去除首尾空白且非空），各判断方法不再重复strip。
+        
+        Returns:
+            tuple: (标题字典列表, 调整嵌套层级后的列表项字典列表)
+        """
         headings = []
+        list_items = []
         total_lines = len(lines)
+        min_len = self.min_heading_length
+        max_len = self.max_heading_length
+        # 编号模式和候选判断只取决于行内容，OCR结果中重复的页眉等行只计算一次；层级判断与行号有关，逐行计算
+        candidate_memo = {}
+        # 循环内反复调用的方法绑定为局部变量，减少属性查找
+        analyze_list_item = self._analyze_list_item_optimized
+        classify_heading_pattern = self._classify_heading_pattern
+        is_heading_candidate = self._is_heading_candidate_optimized
+        determine_heading_level = self._determine_heading_level_optimized
+        
+        min_list_level = None
         
-        # 批量处理，减少函数调用开销
         for i, line in enumerate(lines):
-            if self._is_heading_candidate_optimized(line):
-                level, confidence = self._determine_heading_level_optimized(line, i, total_lines)
+            list_info = analyze_list_item(line, i)
+            if list_info:
+                list_items.append(list_info)
+                if min_list_level is None or list_info['level'] < min_list_level:
+                    min_list_level = list_info['level']
+            
+            # 廉价预筛：长度不在标题范围内的行不可能是候选，跳过正则匹配
+            if not min_len <= len(line) <= max_len:
+                continue
+            memo = candidate_memo.get(line)
+            if memo is None:
+                heading_pattern = classify_heading_pattern(line)
+                memo = candidate_memo[line] = (heading_pattern, is_heading_candidate(line, heading_pattern))
+            heading_pattern, is_candidate = memo
+            if is_candidate:
+                level, confidence = determine_heading_level(line, i, total_lines, heading_pattern)
                 
                 if confidence > 0.3:
                     headings.append({
@@ -518,28 +621,23 @@ class TextAnalyzer:
                         'confidence': confidence
                     })
         
-        return headings
+        return headings, self._adjust_list_nesting(list_items, min_list_level)
     
-    def detect_lists_optimized(self, lines: List[str]) -> List[Dict]:
-        """优化版本的列表检测"""
-        list_items = []
-        
-        for i, line in enumerate(lines):
-            list_info = self._analyze_list_item_optimized(line, i)
-            if list_info:
-                list_items.append(list_info)
-        
-        return self._adjust_list_nesting(list_items)
+    def _classify_heading_pattern(self, line: str) -> Optional[str]:
+        """按优先级匹配标题编号模式，返回命中的模式名，未命中返回None（line须已去除首尾空白）"""
+        match = self._heading_number_pattern.match(line)
+        return match.lastgroup if match else None
     
-    def _is_heading_candidate_optimized(self, line: str) -> bool:
-        """优化版本的标题候选判断"""
-        if not line or len(line.strip()) == 0:
-            return False
+    def _is_heading_candidate_optimized(self, line: str, heading_pattern=_UNCLASSIFIED) -> bool:
+        """优化版本的标题候选判断
         
-        line = line.strip()
+        Args:
+            line: 已去除首尾空白的文本行
+            heading_pattern: 已计算的标题编号模式（_classify_heading_pattern的结果），省略时现场计算
+        """
         line_len = len(line)
         
-        # 快速长度检查
+        # 快速长度检查（同时排除空行）
         if line_len < self.min_heading_length or line_len > self.max_heading_length:
             return False
         
@@ -547,52 +645,37 @@ class TextAnalyzer:
         if self._compiled_patterns['heading_patterns']['list_marker'].match(line):
             return False
         
-        # 快速特征检查
-        score = 0
-        
-        # 使用预编译模式进行快速匹配
-        patterns = self._compiled_patterns['heading_patterns']
+        # 编号模式、关键词、长度分档和结尾特征组合后查预计算的判断表
+        if heading_pattern is _UNCLASSIFIED:
+            heading_pattern = self._classify_heading_pattern(line)
+        has_keyword = self._heading_indicator_pattern.search(line) is not None
+        length_bucket = 0 if line_len <= 20 else 1 if line_len <= 40 else 2
+        no_terminal = not line.endswith(_SENTENCE_END_PUNCTUATION)
         
-        if patterns['chapter'].match(line) or patterns['section'].match(line):
-            score += 0.6
-        elif patterns['numbered_section'].match(line) or patterns['numbered_main'].match(line):
-            score += 0.4
-        
-        # 关键词检查（优化为集合查找）
-        if any(keyword in line for keyword in self.heading_indicators):
-            score += 0.3
-        
-        # 长度特征
-        if line_len <= 20:
-            score += 0.3
-        elif line_len <= 40:
-            score += 0.1
-        
-        # 结尾特征
-        if not line.endswith(('。', '！', '？')):
-            score += 0.2
-        
-        return score >= 0.5
+        return _HEADING_CANDIDATE_TABLE[heading_pattern, has_keyword, length_bucket, no_terminal]
     
-    def _determine_heading_level_optimized(self, line: str, line_number: int, total_lines: int) -> tuple:
-        """优化版本的标题层级判断"""
+    def _determine_heading_level_optimized(self, line: str, line_number: int, total_lines: int,
+                                           heading_pattern=_UNCLASSIFIED) -> tuple:
+        """优化版本的标题层级判断
+        
+        Args:
+            line: 文本行
+            line_number: 行号
+            total_lines: 总行数
+            heading_pattern: 已计算的标题编号模式，省略时现场计算
+        """
         level = 1
         confidence = 0.5
         
-        patterns = self._compiled_patterns['heading_patterns']
+        if heading_pattern is _UNCLASSIFIED:
+            heading_pattern = self._classify_heading_pattern(line)
         
-        # 使用预编译正则表达式进行快速匹配
-        if patterns['chapter'].match(line):
-            level, confidence = 1, 0.9
-        elif patterns['section'].match(line):
-            level, confidence = 2, 0.8
-        elif patterns['numbered_section'].match(line):
-            level, confidence = 2, 0.8
-        elif patterns['numbered_main'].match(line):
-            level, confidence = 1, 0.8
-        elif any(keyword in line for keyword in ['概述', '总结', '介绍']):
+        # 编号模式直接查表得到层级和置信度
+        if heading_pattern is not None:
+            level, confidence = _HEADING_PATTERN_LEVELS[heading_pattern]
+        elif _LEVEL2_KEYWORD_PATTERN.search(line):
             level, confidence = 2, 0.7
-        elif any(keyword in line for keyword in ['部分', '章节']):
+        elif _LEVEL1_KEYWORD_PATTERN.search(line):
             level, confidence = 1, 0.7
         
         # 位置调整
@@ -612,75 +695,65 @@ class TextAnalyzer:
         return level, max(0.0, min(1.0, confidence))
     
     def _analyze_list_item_optimized(self, line: str, line_number: int) -> Dict:
-        """优化版本的列表项分析"""
-        if not line or not line.strip():
+        """优化版本的列表项分析（line须已去除首尾空白）"""
+        # 按首字符预筛，非列表行（含空行）不运行正则
+        first_char = line[:1]
+        if first_char not in _LIST_MARKER_FIRST_CHARS and not first_char.isdecimal():
             return None
         
-        original_line = line
-        line = line.strip()
-        
-        # 使用预编译的正则表达式
-        for pattern in self._compiled_patterns['unordered_list']:
-            match = pattern.match(line)
-            if match:
-                content = match.group(1).strip()
-                level = self._calculate_list_indentation(original_line)
-                return {
-                    'text': content,
-                    'type': 'unordered',
-                    'level': level,
-                    'line_number': line_number,
-                    'marker': line[0],
-                    'full_text': line
-                }
+        # 使用预编译的合并正则表达式
+        match = self._compiled_patterns['list_item'].match(line)
+        if not match:
+            return None
         
-        for pattern in self._compiled_patterns['ordered_list']:
-            match = pattern.match(line)
-            if match:
-                marker = match.group(1)
-                content = match.group(2).strip()
-                level = self._calculate_list_indentation(original_line)
-                return {
-                    'text': content,
-                    'type': 'ordered',
-                    'level': level,
-                    'line_number': line_number,
-                    'marker': marker,
-                    'full_text': line
-                }
+        level = self._calculate_list_indentation(line)
+        if match.lastgroup == 'bullet_text':
+            return {
+                'text': match.group('bullet_text').strip(),
+                'type': 'unordered',
+                'level': level,
+                'line_number': line_number,
+                'marker': match.group('bullet'),
+                'full_text': line
+            }
         
-        return None
+        return {
+            'text': match.group('number_text').strip(),
+            'type': 'ordered',
+            'level': level,
+            'line_number': line_number,
+            'marker': match.group('number'),
+            'full_text': line
+        }
     
     def _extract_paragraphs_optimized(self, lines: List[str], headings: List, lists: List) -> List[str]:
         """优化版本的段落提取"""
-        # 使用集合提高查找性能
         used_line_numbers = {heading.line_number for heading in headings}
         used_line_numbers.update(list_item.line_number for list_item in lists)
         
+        # 段落是相邻已用行之间的连续区间，直接按切片拼接，不必逐行判断和累积
         paragraphs = []
-        current_paragraph = []
-        
-        for i, line in enumerate(lines):
-            if i not in used_line_numbers:
-                current_paragraph.append(line)
-            else:
-                if current_paragraph:
-                    paragraphs.append(' '.join(current_paragraph))
-                    current_paragraph = []
+        total_lines = len(lines)
+        start = 0
+        for used in sorted(used_line_numbers):
+            if used >= total_lines:
+                break
+            if used > start:
+                paragraphs.append(' '.join(lines[start:used]))
+            start = used + 1
         
-        if current_paragraph:
-            paragraphs.append(' '.join(current_paragraph))
+        if start < total_lines:
+            paragraphs.append(' '.join(lines[start:]))
         
         return paragraphs
     
-    def _update_cache(self, text_hash: str, result: TextStructure):
-        """更新分析结果缓存"""
-        if len(self._analysis_cache) >= self._cache_max_size:
-            # 简单的LRU：删除最旧的条目
-            oldest_key = next(iter(self._analysis_cache))
-            del self._analysis_cache[oldest_key]
-        
-        self._analysis_cache[text_hash] = result
+    def _update_cache(self, cache_key: tuple, result: TextStructure):
+        """添加分析结果到缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self._analysis_cache[cache_key] = result
+            self._analysis_cache.move_to_end(cache_key)
+            while len(self._analysis_cache) > self._cache_max_size:
+                self._analysis_cache.popitem(last=False)
     
     def _update_performance_stats(self, analysis_time: float):
         """更新性能统计"""
@@ -698,11 +771,16 @@ class TextAnalyzer:
             stats['cache_hit_rate'] = stats['cache_hits'] / stats['total_analyses']
         else:
             stats['cache_hit_rate'] = 0.0
+        
+        with self._cache_lock:
+            stats['cache_size'] = len(self._analysis_cache)
+        stats['max_cache_size'] = self._cache_max_size
         return stats
     
     def clear_cache(self):
         """清空缓存"""
-        self._analysis_cache.clear()
+        with self._cache_lock:
+            self._analysis_cache.clear()
         
     def reset_performance_stats(self):
         """重置性能统计"""
@@ -2,9 +2,79 @@
 from .analyzer import TextAnalyzer, TextStructure, Heading, ListItem
 from abc import ABC, abstractmethod
 from typing import List, Dict
+import functools
 import re
 
 
+# 预编译的清理和转义正则表达式
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_LINE_START_MARKER_PATTERN = re.compile(r'^(?:(\d+)\.|([-+*])\s)', re.MULTILINE)
+_MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]*)\]\(([^)]*)\)')
+# 标题编号前缀：数字编号、"第X章"、"X、"、中文数字加空格依次可选，一次匹配等价于按顺序逐个移除
+_HEADING_PREFIX_PATTERN = re.compile(
+    r'^(?:\d+(?:\.\d+)*\.?\s*)?'
+    r'(?:第[一二三四五六七八九十]+[章节部分]\.?\s*)?'
+    r'(?:[一二三四五六七八九十]+[、\.]\s*)?'
+    r'(?:[一二三四五六七八九十]+\s+)?'
+)
+_HEADING_TRAILING_PUNCTUATION_PATTERN = re.compile(r'[。！？：；]+$')
+_LIST_NUMBER_MARKER_PATTERN = re.compile(r'^\d+[\.)\s]\s*')
+_LIST_LETTER_MARKER_PATTERN = re.compile(r'^[a-zA-Z][\.)\s]\s*')
+_LIST_CHINESE_MARKER_PATTERN = re.compile(r'^[一二三四五六七八九十]+[\.)\s]\s*')
+
+# 列表标记首字符集合，用于在调用正则前快速排除
+_LIST_BULLET_MARKERS = frozenset('-•*·')
+_ASCII_LETTERS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+_CHINESE_NUMERALS = frozenset('一二三四五六七八九十')
+
+# 需要在任意位置转义的单字符：标题标记#和代码标记`
+_ESCAPE_TABLE = str.maketrans({'#': '\\#', '`': '\\`'})
+
+# 标题前缀（按层级1-6取用）、列表缩进（每级2个空格）及缩进加列表标记的前缀预先生成，避免每次格式化时重复拼接
+_HEADING_MARKS = tuple('#' * level for level in range(7))
+_LIST_INDENTS = tuple('  ' * level for level in range(16))
+_ORDERED_ITEM_PREFIXES = tuple(indent + '1. ' for indent in _LIST_INDENTS)
+_BULLET_ITEM_PREFIXES = tuple(indent + '- ' for indent in _LIST_INDENTS)
+
+
+def _escape_line_start_marker(match: re.Match) -> str:
+    """_LINE_START_MARKER_PATTERN的替换函数：在行首的数字编号点号或列表符号前加反斜杠"""
+    number = match.group(1)
+    if number is not None:
+        return number + '\\.'
+    return '\\' + match.group(2) + ' '
+
+
+def _escape_markdown_link(match: re.Match) -> str:
+    """_MARKDOWN_LINK_PATTERN的替换函数：转义链接的方括号和圆括号，避免每次替换都解析反向引用模板"""
+    return '\\[' + match.group(1) + '\\]\\(' + match.group(2) + '\\)'
+
+
+def _clean_heading(text: str) -> str:
+    """清理标题文本，移除不必要的标点和格式"""
+    # 去除首尾空白
+    text = text.strip()
+    
+    # 移除常见的标题编号格式："1." "1.1" "1.2.3" 等数字编号、"第一章" "第二节" 等中文编号、
+    # "一、" "二、" 等中文数字编号、单独的中文数字后跟空格
+    text = text[_HEADING_PREFIX_PATTERN.match(text).end():]
+    
+    # 移除末尾的标点符号（标题通常不需要句号）
+    text = _HEADING_TRAILING_PUNCTUATION_PATTERN.sub('', text)
+    
+    # 移除多余的空格；编号前缀连同其后的空白一起移除，只有去掉末尾标点后可能留下一个尾部空格
+    text = _WHITESPACE_PATTERN.sub(' ', text)
+    
+    return text.rstrip(' ')
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_heading(text: str, level: int) -> str:
+    """生成markdown标题行（结果只取决于参数，由lru_cache缓存）"""
+    # 确保level在1-6范围内（Markdown标准）
+    return f"{_HEADING_MARKS[max(1, min(6, level))]} {_clean_heading(text)}"
+
+
 class BaseFormatter(ABC):
     """格式转换器基类"""
     
@@ -25,6 +95,13 @@ class MarkdownFormatter(BaseFormatter):
         if not text or not text.strip():
             return ""
         
+        # 单行且超过标题最大长度的非列表文本只能是一个段落（OCR整段识别结果的常见情况），跳过结构分析
+        if '\n' not in text:
+            stripped = text.strip()
+            if (len(stripped) > self.analyzer.max_heading_length
+                    and not self.analyzer.is_list_item(stripped)):
+                return self._clean_paragraph_text(stripped)
+        
         # 将文本分割为行
         lines = text.split('\n')
         
@@ -36,28 +113,28 @@ class MarkdownFormatter(BaseFormatter):
         
         # 处理标题
         if structure.headings:
-            heading_lines = self._get_heading_lines(structure.headings, lines)
+            heading_lines = self._get_heading_lines(structure.headings)
             markdown_parts.extend(heading_lines)
         
         # 处理列表
         if structure.lists:
-            list_lines = self._get_list_lines(structure.lists, lines)
+            list_lines = self._get_list_lines(structure.lists)
             markdown_parts.extend(list_lines)
         
         # 处理段落
         if structure.paragraphs:
-            formatted_paragraphs = self.format_paragraphs(structure.paragraphs)
+            formatted_paragraphs = self._format_text_paragraphs(structure.paragraphs)
             if formatted_paragraphs:
                 markdown_parts.append(formatted_paragraphs)
         
         # 如果没有识别到任何结构，直接返回格式化的段落
         if not markdown_parts:
-            return self.format_paragraphs(lines)
+            return self._format_text_paragraphs(lines)
         
         # 合并所有部分，确保适当的间距
         return self._merge_markdown_parts(markdown_parts)
     
-    def _get_heading_lines(self, headings: List, lines: List[str]) -> List[str]:
+    def _get_heading_lines(self, headings: List) -> List[str]:
         """获取标题对应的markdown行"""
         heading_lines = []
         for heading in headings:
@@ -66,7 +143,7 @@ class MarkdownFormatter(BaseFormatter):
                 heading_lines.append(formatted)
         return heading_lines
     
-    def _get_list_lines(self, lists: List, lines: List[str]) -> List[str]:
+    def _get_list_lines(self, lists: List) -> List[str]:
         """获取列表对应的markdown行"""
         list_lines = []
         for list_item in lists:
@@ -79,28 +156,17 @@ class MarkdownFormatter(BaseFormatter):
                 list_lines.append(formatted)
         return list_lines
     
-    def _get_paragraph_lines(self, paragraphs: List[str]) -> List[str]:
-        """获取段落对应的markdown行"""
-        paragraph_lines = []
-        for paragraph in paragraphs:
-            if paragraph.strip():
-                paragraph_lines.append(paragraph.strip())
-        return paragraph_lines
-    
     def _merge_markdown_parts(self, parts: List[str]) -> str:
         """合并markdown部分，确保适当的间距"""
         if not parts:
             return ""
         
-        result = []
-        for i, part in enumerate(parts):
-            if part.strip():
-                result.append(part)
-                # 在标题后添加空行
-                if part.startswith('#') and i < len(parts) - 1:
-                    result.append("")
-        
-        return '\n'.join(result)
+        # 跳过空白部分；标题后（非最后一部分时）追加换行，与下一部分之间形成空行
+        last = len(parts) - 1
+        return '\n'.join(
+            part + '\n' if i < last and part.startswith('#') else part
+            for i, part in enumerate(parts) if part.strip()
+        )
     
     def format_headings(self, headings: List[Dict]) -> str:
         """格式化标题"""
@@ -109,7 +175,10 @@ class MarkdownFormatter(BaseFormatter):
         
         formatted_headings = []
         for heading in headings:
-            if isinstance(heading, dict):
+            if type(heading) is Heading:
+                text = heading.text
+                level = heading.level
+            elif isinstance(heading, dict):
                 text = heading.get('text', '')
                 level = heading.get('level', 1)
             else:
@@ -128,12 +197,18 @@ class MarkdownFormatter(BaseFormatter):
         if not lists:
             return ""
         
-        formatted_lists = []
-        current_group = []
+        # 所有列表组写入同一个行列表，组之间插入空字符串，最终一次join得到组间空行
+        output_lines = []
         last_line_number = -1
         
         for list_item in lists:
-            if isinstance(list_item, dict):
+            if type(list_item) is ListItem:
+                # 分析器产出的ListItem字段齐全，直接访问属性
+                text = list_item.text
+                item_type = list_item.type
+                level = list_item.level
+                line_number = list_item.line_number
+            elif isinstance(list_item, dict):
                 text = list_item.get('text', '')
                 item_type = list_item.get('type', 'unordered')
                 level = list_item.get('level', 0)
@@ -148,23 +223,15 @@ class MarkdownFormatter(BaseFormatter):
             if not text.strip():
                 continue
             
-            # 检查是否是连续的列表项（行号相差不超过2）
+            # 检查是否是连续的列表项（行号相差不超过2），不连续时结束当前列表组
             if last_line_number >= 0 and line_number - last_line_number > 2:
-                # 结束当前列表组
-                if current_group:
-                    formatted_lists.append('\n'.join(current_group))
-                    current_group = []
+                output_lines.append('')
             
             # 格式化当前列表项
-            formatted_item = self._format_single_list_item(text, item_type, level)
-            current_group.append(formatted_item)
+            output_lines.append(self._format_single_list_item(text, item_type, level))
             last_line_number = line_number
         
-        # 添加最后一个列表组
-        if current_group:
-            formatted_lists.append('\n'.join(current_group))
-        
-        return '\n\n'.join(formatted_lists)
+        return '\n'.join(output_lines)
     
     def format_paragraphs(self, paragraphs: List[str]) -> str:
         """格式化段落"""
@@ -180,7 +247,7 @@ class MarkdownFormatter(BaseFormatter):
                     formatted_paragraphs.append(cleaned_paragraph)
             elif isinstance(paragraph, list):
                 # 如果传入的是行列表，合并为段落
-                combined_text = ' '.join(line.strip() for line in paragraph if line.strip())
+                combined_text = ' '.join(filter(None, map(str.strip, paragraph)))
                 cleaned_paragraph = self._clean_paragraph_text(combined_text)
                 if cleaned_paragraph:
                     formatted_paragraphs.append(cleaned_paragraph)
@@ -188,67 +255,35 @@ class MarkdownFormatter(BaseFormatter):
         # 段落之间用双换行分隔
         return '\n\n'.join(formatted_paragraphs)
     
+    def _format_text_paragraphs(self, paragraphs: List[str]) -> str:
+        """格式化全部为字符串的段落（分析器输出），省去format_paragraphs中逐项的类型判断"""
+        return '\n\n'.join(filter(None, map(self._clean_paragraph_text, paragraphs)))
+    
     def _clean_paragraph_text(self, text: str) -> str:
         """清理段落文本，处理换行和特殊字符"""
-        import re
-        
         if not text or not text.strip():
             return ""
         
         # 去除首尾空白
         text = text.strip()
         
-        # 处理内部换行：将单个换行替换为空格，保留双换行
-        # 先标记双换行，然后替换单换行，最后恢复双换行
-        text = text.replace('\n\n', '<<DOUBLE_NEWLINE>>')
-        text = text.replace('\n', ' ')
-        text = text.replace('<<DOUBLE_NEWLINE>>', '\n\n')
-        
-        # 处理多个连续空格
-        text = re.sub(r'\s+', ' ', text)
+        # 内部换行和连续空白一次性合并为单个空格（段落间的分隔由调用方添加）
+        text = _WHITESPACE_PATTERN.sub(' ', text)
         
-        # 转义markdown特殊字符（但保留基本标点）
-        text = self._escape_markdown_characters(text)
-        
-        return text.strip()
+        # 转义markdown特殊字符（但保留基本标点）；首尾已无空白，转义也不会引入空白，无需再次strip
+        return self._escape_markdown_characters(text)
     
     def _escape_markdown_characters(self, text: str) -> str:
         """转义markdown特殊字符"""
-        # 需要转义的markdown特殊字符
-        # 注意：我们只转义可能造成格式问题的字符，保留基本的标点符号
-        special_chars = {
-            '\\': '\\\\',  # 反斜杠必须首先转义
-            '`': '\\`',    # 代码标记
-            '*': '\\*',    # 强调标记（但在中文环境中可能不需要）
-            '_': '\\_',    # 强调标记
-            '[': '\\[',    # 链接标记
-            ']': '\\]',    # 链接标记
-            '(': '\\(',    # 链接标记
-            ')': '\\)',    # 链接标记
-            '#': '\\#',    # 标题标记（行首）
-            '+': '\\+',    # 列表标记
-            '-': '\\-',    # 列表标记（但需要谨慎，可能是正常的连字符）
-            '.': '\\.',    # 有序列表标记（数字后的点）
-            '!': '\\!',    # 图片标记
-        }
-        
-        # 只转义行首的特殊字符或明确会造成格式问题的字符
-        result = text
-        
-        # 转义所有的#（避免被误认为标题）
-        result = result.replace('#', '\\#')
+        # 只转义行首的特殊字符或明确会造成格式问题的字符，保留基本的标点符号
+        # 转义所有的#（避免被误认为标题）和代码标记`
+        result = text.translate(_ESCAPE_TABLE)
         
-        # 转义行首的数字+点（避免被误认为有序列表）
-        result = re.sub(r'^(\d+)\.', r'\1\\.', result, flags=re.MULTILINE)
-        
-        # 转义行首的-、+、*（避免被误认为无序列表）
-        result = re.sub(r'^([-+*])\s', r'\\\1 ', result, flags=re.MULTILINE)
-        
-        # 转义代码标记
-        result = result.replace('`', '\\`')
+        # 转义行首的数字+点（避免被误认为有序列表）和行首的-、+、*（避免被误认为无序列表）
+        result = _LINE_START_MARKER_PATTERN.sub(_escape_line_start_marker, result)
         
         # 转义链接标记（但要小心不要转义正常的括号）
-        result = re.sub(r'\[([^\]]*)\]\(([^)]*)\)', r'\\[\1\\]\\(\2\\)', result)
+        result = _MARKDOWN_LINK_PATTERN.sub(_escape_markdown_link, result)
         
         return result
     
@@ -257,39 +292,12 @@ class MarkdownFormatter(BaseFormatter):
         if not text or not text.strip():
             return ""
         
-        # 确保level在1-6范围内（Markdown标准）
-        level = max(1, min(6, level))
-        
-        # 清理标题文本
-        clean_text = self._clean_heading_text(text)
-        
-        # 生成markdown标题
-        return f"{'#' * level} {clean_text}"
+        # OCR批量处理中页眉、章节标题等经常重复，按(文本, 层级)缓存格式化结果
+        return _build_heading(text, level)
     
     def _clean_heading_text(self, text: str) -> str:
         """清理标题文本，移除不必要的标点和格式"""
-        import re
-        
-        # 去除首尾空白
-        text = text.strip()
-        
-        # 移除常见的标题编号格式
-        # 移除 "1." "1.1" "1.2.3" 等数字编号
-        text = re.sub(r'^\d+(\.\d+)*\.?\s*', '', text)  # 移除数字编号（包括多级编号）
-        # 移除 "第一章" "第二节" 等中文编号
-        text = re.sub(r'^第[一二三四五六七八九十]+[章节部分]\.?\s*', '', text)  
-        # 移除 "一、" "二、" 等中文数字编号
-        text = re.sub(r'^[一二三四五六七八九十]+[、\.]\s*', '', text)  
-        # 移除单独的中文数字后跟空格
-        text = re.sub(r'^[一二三四五六七八九十]+\s+', '', text)
-        
-        # 移除末尾的标点符号（标题通常不需要句号）
-        text = re.sub(r'[。！？：；]+$', '', text)
-        
-        # 移除多余的空格
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return _clean_heading(text)
     
     def _format_single_list_item(self, text: str, item_type: str, level: int = 0) -> str:
         """格式化单个列表项（内部辅助方法）"""
@@ -299,35 +307,33 @@ class MarkdownFormatter(BaseFormatter):
         # 清理列表项文本
         clean_text = self._clean_list_item_text(text)
         
-        # 计算缩进（每级2个空格）
-        indent = "  " * max(0, level)
-        
-        # 根据类型生成markdown列表项
-        if item_type == 'ordered':
-            return f"{indent}1. {clean_text}"
+        # 根据类型和层级取缩进（每级2个空格）与列表标记合成的前缀，生成markdown列表项
+        if 0 <= level < 16:
+            prefix = (_ORDERED_ITEM_PREFIXES if item_type == 'ordered' else _BULLET_ITEM_PREFIXES)[level]
         else:
-            return f"{indent}- {clean_text}"
+            prefix = "  " * max(0, level) + ('1. ' if item_type == 'ordered' else '- ')
+        return prefix + clean_text
     
     def _clean_list_item_text(self, text: str) -> str:
         """清理列表项文本，移除原有的列表标记"""
-        import re
-        
         # 去除首尾空白
         text = text.strip()
         
-        # 移除原有的列表标记
+        # 移除原有的列表标记，先按首字符判断，首字符不可能构成标记时不调用正则
         # 移除无序列表标记：- • * ·
-        text = re.sub(r'^[-•*·]\s*', '', text)
+        if text[:1] in _LIST_BULLET_MARKERS:
+            text = text[1:].lstrip()
         
         # 移除有序列表标记：1. 1) a. A. 一. 等
-        text = re.sub(r'^\d+[\.)\s]\s*', '', text)  # 数字编号
-        text = re.sub(r'^[a-zA-Z][\.)\s]\s*', '', text)  # 字母编号
-        text = re.sub(r'^[一二三四五六七八九十]+[\.)\s]\s*', '', text)  # 中文数字编号
-        
-        # 移除多余的空格
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        if text[:1].isdecimal():
+            text = _LIST_NUMBER_MARKER_PATTERN.sub('', text)  # 数字编号
+        if text[:1] in _ASCII_LETTERS:
+            text = _LIST_LETTER_MARKER_PATTERN.sub('', text)  # 字母编号
+        if text[:1] in _CHINESE_NUMERALS:
+            text = _LIST_CHINESE_MARKER_PATTERN.sub('', text)  # 中文数字编号
+        
+        # 移除多余的空格；文本已去除首尾空白，合并后不会产生首尾空格
+        return _WHITESPACE_PATTERN.sub(' ', text)
 
 
 class HTMLFormatter(BaseFormatter):
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Gunicorn生产部署配置
+
+用法：gunicorn -c gunicorn_conf.py app:app
+
+主进程预加载应用并同步加载OCR模型，fork出的worker通过写时复制共享
+已加载的模型权重，无需各自重复加载。主进程不执行推理：OpenMP/MKLDNN线程池
+在fork前创建会使子进程处于不可用状态，因此预热和批处理线程在每个worker
+fork之后启动。PaddlePaddle默认的内存分配策略会在推理时改写已分配的内存页，
+导致共享页被复制；如发现worker内存接近模型大小，请设置环境变量
+FLAGS_allocator_strategy=auto_growth。
+
+worker使用gthread类型，每个worker的多个请求线程可被批处理线程合并为一次
+predict调用；GUNICORN_THREADS不大于1时等同于同步worker，不启动批处理线程。
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', max(2, (os.cpu_count() or 2) // 2)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = 120
+
+
+def on_starting(server):
+    """fork worker之前在主进程中加载OCR模型（不预热，避免在fork前创建推理线程池）"""
+    import app
+    
+    if app.ocr_service is None and app.can_init_ocr_immediately():
+        app.init_ocr_async(warmup=False)
+
+
+def post_fork(server, worker):
+    """在每个worker中预热模型；后台线程不会随fork复制，多线程worker中重新启动批处理线程。
+    主进程未加载模型时在worker中预导入paddleocr（主进程不预导入，避免导入途中fork）"""
+    import app
+    
+    if app.ocr_service is not None:
+        app.warmup_ocr()
+        if threads > 1:
+            app._batch_queue.start()
+    else:
+        app.start_paddle_preimport()
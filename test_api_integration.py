@@ -13,6 +13,7 @@ from io import BytesIO
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from test_helpers import create_test_image_data
 from app import app
 
 
@@ -37,6 +38,7 @@ class TestAPIIntegration(unittest.TestCase):
 
 详细说明
 每个功能的详细说明..."""
+        self.test_lines = self.test_text.split('\n')
     
     @patch('app.ocr_service')
     def test_complete_workflow_text_to_markdown(self, mock_ocr_service):
@@ -44,13 +46,13 @@ class TestAPIIntegration(unittest.TestCase):
         # 步骤1：模拟OCR识别
         mock_ocr_service.predict.return_value = [
             {
-                'rec_texts': self.test_text.split('\n'),
-                'rec_scores': [0.95] * len(self.test_text.split('\n'))
+                'rec_texts': self.test_lines,
+                'rec_scores': [0.95] * len(self.test_lines)
             }
         ]
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 执行OCR
@@ -269,7 +271,7 @@ class TestAPIIntegration(unittest.TestCase):
         ]
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 执行OCR
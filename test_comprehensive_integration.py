@@ -14,7 +14,9 @@ import json
 import tempfile
 import time
 import threading
+import queue
 import concurrent.futures
+import itertools
 import random
 import string
 from unittest.mock import patch, MagicMock
@@ -34,27 +36,20 @@ from core.text_processing.formatters import MarkdownFormatter
 class TestEndToEndUserFlows(unittest.TestCase):
     """端到端用户流程测试 - Requirements 1.1, 1.2"""
     
-    def setUp(self):
-        """设置测试环境"""
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app_context = self.app.app_context()
-        self.app_context.push()
-        self.client = self.app.test_client()
-        
-        # 创建测试图片
-        self.test_images = {
-            'simple': self.create_test_image(200, 100, 'Simple Document'),
-            'complex': self.create_test_image(400, 300, 'Complex Report'),
-            'large': self.create_test_image(800, 600, 'Large Document')
-        }
+    # 按(宽, 高)缓存编码好的测试图片
+    _image_cache = {}
     
-    def tearDown(self):
-        """清理测试环境"""
-        self.app_context.pop()
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（应用、上下文和测试客户端在类内所有测试间共享）"""
+        cls.app = create_app()
+        cls.app.config['TESTING'] = True
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
         
         # 模拟不同类型的OCR结果
-        self.ocr_results = {
+        cls.ocr_results = {
             'simple_text': [
                 {
                     'rec_texts': [
@@ -102,13 +97,29 @@ class TestEndToEndUserFlows(unittest.TestCase):
             ]
         }
     
+    @classmethod
+    def tearDownClass(cls):
+        """清理测试环境"""
+        cls.app_context.pop()
+    
+    def setUp(self):
+        """创建测试图片（上传会读取图片流，每个测试重新创建）"""
+        self.test_images = {
+            'simple': self.create_test_image(200, 100, 'Simple Document'),
+            'complex': self.create_test_image(400, 300, 'Complex Report'),
+            'large': self.create_test_image(800, 600, 'Large Document')
+        }
+    
     def create_test_image(self, width, height, text):
-        """创建测试图片"""
-        img = Image.new('RGB', (width, height), color='white')
-        img_bytes = BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-        return img_bytes
+        """创建测试图片（同尺寸的PNG只编码一次，每次返回新的字节流）"""
+        key = (width, height)
+        png_bytes = self._image_cache.get(key)
+        if png_bytes is None:
+            img = Image.new('RGB', (width, height), color='white')
+            img_bytes = BytesIO()
+            img.save(img_bytes, format='PNG')
+            png_bytes = self._image_cache[key] = img_bytes.getvalue()
+        return BytesIO(png_bytes)
     
     def test_complete_workflow_text_format(self):
         """测试完整工作流程 - 纯文本格式 (Requirement 1.1)"""
@@ -123,7 +134,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
             )
             
             self.assertEqual(response.status_code, 200)
-            ocr_data = json.loads(response.data)
+            ocr_data = response.get_json()
             self.assertTrue(ocr_data['success'])
             self.assertIn('text_content', ocr_data['data'])
             self.assertIn('available_formats', ocr_data['data'])
@@ -143,7 +154,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
             )
             
             self.assertEqual(response.status_code, 200)
-            convert_data = json.loads(response.data)
+            convert_data = response.get_json()
             self.assertTrue(convert_data['success'])
             self.assertEqual(convert_data['data']['target_format'], 'text')
             self.assertEqual(convert_data['data']['converted_text'], original_text)
@@ -181,7 +192,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
             )
             
             self.assertEqual(response.status_code, 200)
-            ocr_data = json.loads(response.data)
+            ocr_data = response.get_json()
             self.assertTrue(ocr_data['success'])
             self.assertIn('markdown', ocr_data['data']['available_formats'])
             
@@ -198,7 +209,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
             )
             
             self.assertEqual(response.status_code, 200)
-            convert_data = json.loads(response.data)
+            convert_data = response.get_json()
             self.assertTrue(convert_data['success'])
             self.assertEqual(convert_data['data']['target_format'], 'markdown')
             
@@ -244,7 +255,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
                 content_type='multipart/form-data'
             )
             
-            original_text = json.loads(response.data)['data']['text_content']
+            original_text = response.get_json()['data']['text_content']
             
             # 先转换为Markdown
             markdown_response = self.client.post(
@@ -256,7 +267,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
                 content_type='application/json'
             )
             
-            markdown_data = json.loads(markdown_response.data)
+            markdown_data = markdown_response.get_json()
             self.assertTrue(markdown_data['success'])
             
             # 再转换回文本格式
@@ -269,7 +280,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
                 content_type='application/json'
             )
             
-            text_data = json.loads(text_response.data)
+            text_data = text_response.get_json()
             self.assertTrue(text_data['success'])
             self.assertEqual(text_data['data']['converted_text'], original_text)
             
@@ -301,7 +312,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
                 content_type='multipart/form-data'
             )
             
-            original_text = json.loads(response.data)['data']['text_content']
+            original_text = response.get_json()['data']['text_content']
             
             # 模拟格式转换失败，应该回退到文本格式
             with patch('core.text_processing.formatters.MarkdownFormatter.convert') as mock_convert:
@@ -317,7 +328,7 @@ class TestEndToEndUserFlows(unittest.TestCase):
                 )
                 
                 self.assertEqual(response.status_code, 200)
-                data = json.loads(response.data)
+                data = response.get_json()
                 self.assertTrue(data['success'])
                 
                 # 应该回退到文本格式
@@ -341,20 +352,18 @@ class TestEndToEndUserFlows(unittest.TestCase):
 class TestDifferentDocumentTypes(unittest.TestCase):
     """测试不同文档类型的处理效果 - Requirements 2.1, 2.2"""
     
-    def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app_context = self.app.app_context()
-        self.app_context.push()
-        self.client = self.app.test_client()
-        self.export_manager = ExportManager()
-    
-    def tearDown(self):
-        """清理测试环境"""
-        self.app_context.pop()
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（应用、上下文、测试客户端和导出管理器在类内所有测试间共享）"""
+        cls.app = create_app()
+        cls.app.config['TESTING'] = True
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        cls.export_manager = ExportManager()
         
         # 定义不同类型的测试文档
-        self.document_types = {
+        cls.document_types = {
             'simple_paragraphs': {
                 'text': """这是第一个段落的内容，包含了一些基本信息。
 
@@ -488,14 +497,41 @@ def hello_world():
                 'expected_elements': ['headings', 'paragraphs', 'lists', 'code', 'tables']
             }
         }
-    
-    def test_simple_paragraph_processing(self):
-        """测试简单段落文档处理 (Requirement 2.1)"""
-        doc = self.document_types['simple_paragraphs']
         
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
+        # 各类文档转换为Markdown的请求体只序列化一次
+        cls.markdown_convert_bodies = {
+            doc_type: json.dumps({
+                'text': doc_data['text'],
+                'target_format': 'markdown'
+            })
+            for doc_type, doc_data in cls.document_types.items()
+        }
+    
+    @classmethod
+    def tearDownClass(cls):
+        """清理测试环境"""
+        cls.app_context.pop()
+    
+    def test_document_type_conversion(self):
+        """测试不同类型文档的格式转换，逐类检查处理效果 (Requirements 2.1, 2.2)"""
+        checks = {
+            'simple_paragraphs': self.check_simple_paragraph_processing,
+            'with_headings': self.check_heading_detection_and_formatting,
+            'with_lists': self.check_list_detection_and_formatting,
+            'complex_structure': self.check_complex_document_structure,
+            'special_characters': self.check_special_characters_handling,
+            'mixed_content': self.check_mixed_content_document
+        }
         
-        self.assertEqual(result['format'], 'markdown')
+        for doc_type, check in checks.items():
+            with self.subTest(document_type=doc_type):
+                result = self.export_manager.convert_format(self.document_types[doc_type]['text'], 'markdown')
+                
+                self.assertEqual(result['format'], 'markdown')
+                check(result)
+    
+    def check_simple_paragraph_processing(self, result):
+        """检查简单段落文档处理 (Requirement 2.1)"""
         self.assertGreater(len(result['content']), 0)
         self.assertIn('conversion_time', result)
         
@@ -505,13 +541,8 @@ def hello_world():
         self.assertIn('第二个段落', markdown_content)
         self.assertIn('第三个段落', markdown_content)
     
-    def test_heading_detection_and_formatting(self):
-        """测试标题检测和格式化 (Requirement 2.2)"""
-        doc = self.document_types['with_headings']
-        
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
-        
-        self.assertEqual(result['format'], 'markdown')
+    def check_heading_detection_and_formatting(self, result):
+        """检查标题检测和格式化 (Requirement 2.2)"""
         markdown_content = result['content']
         
         # 验证标题被正确识别和格式化
@@ -523,13 +554,8 @@ def hello_world():
             self.assertGreater(structure.get('headings_count', 0), 0)
             self.assertGreater(structure.get('paragraphs_count', 0), 0)
     
-    def test_list_detection_and_formatting(self):
-        """测试列表检测和格式化 (Requirement 2.2)"""
-        doc = self.document_types['with_lists']
-        
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
-        
-        self.assertEqual(result['format'], 'markdown')
+    def check_list_detection_and_formatting(self, result):
+        """检查列表检测和格式化 (Requirement 2.2)"""
         markdown_content = result['content']
         
         # 验证列表格式
@@ -541,13 +567,8 @@ def hello_world():
             structure = result['structure_info']
             self.assertGreater(structure.get('lists_count', 0), 0)
     
-    def test_complex_document_structure(self):
-        """测试复杂文档结构处理 (Requirements 2.1, 2.2)"""
-        doc = self.document_types['complex_structure']
-        
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
-        
-        self.assertEqual(result['format'], 'markdown')
+    def check_complex_document_structure(self, result):
+        """检查复杂文档结构处理 (Requirements 2.1, 2.2)"""
         markdown_content = result['content']
         
         # 验证多级标题
@@ -566,13 +587,8 @@ def hello_world():
             self.assertGreater(structure.get('paragraphs_count', 0), 0)
             self.assertGreater(structure.get('lists_count', 0), 0)
     
-    def test_special_characters_handling(self):
-        """测试特殊字符处理 (Requirement 2.2)"""
-        doc = self.document_types['special_characters']
-        
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
-        
-        self.assertEqual(result['format'], 'markdown')
+    def check_special_characters_handling(self, result):
+        """检查特殊字符处理 (Requirement 2.2)"""
         markdown_content = result['content']
         
         # 验证特殊字符被正确处理（转义或保留）
@@ -581,13 +597,8 @@ def hello_world():
         # 验证转义字符被正确处理
         self.assertIn('转义', markdown_content)
     
-    def test_mixed_content_document(self):
-        """测试混合内容文档处理 (Requirements 2.1, 2.2)"""
-        doc = self.document_types['mixed_content']
-        
-        result = self.export_manager.convert_format(doc['text'], 'markdown')
-        
-        self.assertEqual(result['format'], 'markdown')
+    def check_mixed_content_document(self, result):
+        """检查混合内容文档处理 (Requirements 2.1, 2.2)"""
         markdown_content = result['content']
         
         # 验证各种内容类型都被正确处理
@@ -640,20 +651,17 @@ def hello_world():
     
     def test_document_type_end_to_end_workflow(self):
         """测试不同文档类型的端到端工作流程 (Requirements 2.1, 2.2)"""
-        for doc_type, doc_data in self.document_types.items():
+        for doc_type, convert_body in self.markdown_convert_bodies.items():
             with self.subTest(document_type=doc_type):
                 # 格式转换
                 convert_response = self.client.post(
                     '/api/convert-format',
-                    data=json.dumps({
-                        'text': doc_data['text'],
-                        'target_format': 'markdown'
-                    }),
+                    data=convert_body,
                     content_type='application/json'
                 )
                 
                 self.assertEqual(convert_response.status_code, 200)
-                convert_data = json.loads(convert_response.data)
+                convert_data = convert_response.get_json()
                 self.assertTrue(convert_data['success'])
                 
                 # 文件下载
@@ -675,33 +683,69 @@ def hello_world():
 class TestConcurrentUserAccess(unittest.TestCase):
     """测试并发用户访问场景 - Requirements 1.1, 1.2"""
     
-    def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app_context = self.app.app_context()
-        self.app_context.push()
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（应用、上下文和客户端在类内所有测试间共享）"""
+        cls.app = create_app()
+        cls.app.config['TESTING'] = True
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
         
         # 创建多个客户端实例模拟并发用户
-        self.num_clients = 10
-        self.clients = [self.app.test_client() for _ in range(self.num_clients)]
+        cls.num_clients = 10
+        cls.clients = [cls.app.test_client() for _ in range(cls.num_clients)]
         
         # 测试数据
-        self.test_texts = [
+        cls.test_texts = [
             f"并发测试文本 {i}：这是用于测试并发访问的文本内容。" * 10
-            for i in range(self.num_clients)
+            for i in range(cls.num_clients)
         ]
         
-        # 结果收集
-        self.results = []
-        self.errors = []
-        self.lock = threading.Lock()
+        # Markdown转换测试使用的结构化文本
+        cls.structured_texts = [
+            f"""标题 {i}
+            
+概述 {i}
+这是第{i}个并发测试的概述部分。
+
+功能列表 {i}：
+- 功能 {i}.1
+- 功能 {i}.2
+- 功能 {i}.3
+
+详细说明 {i}
+这里是详细的说明内容。"""
+            for i in range(cls.num_clients)
+        ]
+        
+        # 并发下载测试的文件内容
+        cls.download_contents = [
+            f"下载测试内容 {i}：这是用于测试并发下载的文件内容。" * 20
+            for i in range(cls.num_clients)
+        ]
+        # 混合文本和Markdown格式下载
+        cls.download_formats = [
+            'markdown' if i % 2 == 0 else 'text'
+            for i in range(cls.num_clients)
+        ]
+        
+        # 并发测试共用的线程池，线程在各测试间复用
+        cls.executor = concurrent.futures.ThreadPoolExecutor(max_workers=cls.num_clients)
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """清理测试环境"""
-        self.app_context.pop()
+        cls.executor.shutdown(wait=True)
+        cls.app_context.pop()
+    
+    def setUp(self):
+        # 结果收集；未经线程池的工作线程将(是否成功, 信息)放入无锁队列，结束后统一取出
+        self.results = []
+        self.errors = []
+        self.result_queue = queue.SimpleQueue()
     
     def worker_format_conversion(self, client_id, client, text, target_format):
-        """格式转换工作线程"""
+        """格式转换工作线程，返回(是否成功, 结果或错误信息)"""
         try:
             response = client.post(
                 '/api/convert-format',
@@ -712,33 +756,30 @@ class TestConcurrentUserAccess(unittest.TestCase):
                 content_type='application/json'
             )
             
-            with self.lock:
-                if response.status_code == 200:
-                    data = json.loads(response.data)
-                    self.results.append({
-                        'client_id': client_id,
-                        'success': data['success'],
-                        'format': data['data']['target_format'],
-                        'conversion_time': data['data']['conversion_time'],
-                        'content_length': len(data['data']['converted_text'])
-                    })
-                else:
-                    self.errors.append({
-                        'client_id': client_id,
-                        'status_code': response.status_code,
-                        'response': response.data.decode('utf-8')
-                    })
+            if response.status_code == 200:
+                data = response.get_json()
+                return True, {
+                    'client_id': client_id,
+                    'success': data['success'],
+                    'format': data['data']['target_format'],
+                    'conversion_time': data['data']['conversion_time'],
+                    'content_length': len(data['data']['converted_text'])
+                }
+            return False, {
+                'client_id': client_id,
+                'status_code': response.status_code,
+                'response': response.data.decode('utf-8')
+            }
                     
         except Exception as e:
-            with self.lock:
-                self.errors.append({
-                    'client_id': client_id,
-                    'error': str(e),
-                    'error_type': type(e).__name__
-                })
+            return False, {
+                'client_id': client_id,
+                'error': str(e),
+                'error_type': type(e).__name__
+            }
     
     def worker_download_file(self, client_id, client, content, format_type):
-        """文件下载工作线程"""
+        """文件下载工作线程，返回(是否成功, 结果或错误信息)"""
         try:
             response = client.post(
                 '/api/download-result',
@@ -750,49 +791,49 @@ class TestConcurrentUserAccess(unittest.TestCase):
                 content_type='application/json'
             )
             
-            with self.lock:
-                if response.status_code == 200:
-                    self.results.append({
-                        'client_id': client_id,
-                        'success': True,
-                        'content_type': response.headers.get('Content-Type'),
-                        'content_length': len(response.data),
-                        'filename': f'concurrent_test_{client_id}'
-                    })
-                else:
-                    self.errors.append({
-                        'client_id': client_id,
-                        'status_code': response.status_code,
-                        'operation': 'download'
-                    })
+            if response.status_code == 200:
+                return True, {
+                    'client_id': client_id,
+                    'success': True,
+                    'content_type': response.headers.get('Content-Type'),
+                    'content_length': len(response.data),
+                    'filename': f'concurrent_test_{client_id}'
+                }
+            return False, {
+                'client_id': client_id,
+                'status_code': response.status_code,
+                'operation': 'download'
+            }
                     
         except Exception as e:
-            with self.lock:
-                self.errors.append({
-                    'client_id': client_id,
-                    'error': str(e),
-                    'operation': 'download'
-                })
+            return False, {
+                'client_id': client_id,
+                'error': str(e),
+                'operation': 'download'
+            }
+    
+    def collect_results(self, outcomes):
+        """按是否成功将工作线程返回的(是否成功, 信息)分别收集到results和errors"""
+        for ok, info in outcomes:
+            (self.results if ok else self.errors).append(info)
+    
+    def drain_result_queue(self):
+        """取出result_queue中的全部(是否成功, 信息)，分别收集到results和errors"""
+        while not self.result_queue.empty():
+            ok, info = self.result_queue.get()
+            (self.results if ok else self.errors).append(info)
     
     def test_concurrent_format_conversion_text(self):
         """测试并发文本格式转换 (Requirement 1.1)"""
         self.results.clear()
         self.errors.clear()
         
-        threads = []
-        
-        # 创建并启动多个线程
-        for i, (client, text) in enumerate(zip(self.clients, self.test_texts)):
-            thread = threading.Thread(
-                target=self.worker_format_conversion,
-                args=(i, client, text, 'text')
-            )
-            threads.append(thread)
-            thread.start()
-        
-        # 等待所有线程完成
-        for thread in threads:
-            thread.join(timeout=60)  # 60秒超时
+        # 在共享线程池中批量执行并等待所有任务完成
+        self.collect_results(self.executor.map(
+            self.worker_format_conversion,
+            range(self.num_clients), self.clients, self.test_texts, itertools.repeat('text'),
+            timeout=60  # 60秒超时
+        ))
         
         # 验证结果
         self.assertEqual(len(self.errors), 0, f"并发文本转换测试出现错误: {self.errors}")
@@ -810,37 +851,12 @@ class TestConcurrentUserAccess(unittest.TestCase):
         self.results.clear()
         self.errors.clear()
         
-        # 使用结构化文本进行Markdown转换测试
-        structured_texts = [
-            f"""标题 {i}
-            
-概述 {i}
-这是第{i}个并发测试的概述部分。
-
-功能列表 {i}：
-- 功能 {i}.1
-- 功能 {i}.2
-- 功能 {i}.3
-
-详细说明 {i}
-这里是详细的说明内容。"""
-            for i in range(self.num_clients)
-        ]
-        
-        threads = []
-        
-        # 创建并启动多个线程
-        for i, (client, text) in enumerate(zip(self.clients, structured_texts)):
-            thread = threading.Thread(
-                target=self.worker_format_conversion,
-                args=(i, client, text, 'markdown')
-            )
-            threads.append(thread)
-            thread.start()
-        
-        # 等待所有线程完成
-        for thread in threads:
-            thread.join(timeout=60)
+        # 在共享线程池中批量执行并等待所有任务完成
+        self.collect_results(self.executor.map(
+            self.worker_format_conversion,
+            range(self.num_clients), self.clients, self.structured_texts, itertools.repeat('markdown'),
+            timeout=60
+        ))
         
         # 验证结果
         self.assertEqual(len(self.errors), 0, f"并发Markdown转换测试出现错误: {self.errors}")
@@ -858,27 +874,12 @@ class TestConcurrentUserAccess(unittest.TestCase):
         self.results.clear()
         self.errors.clear()
         
-        # 准备下载内容
-        download_contents = [
-            f"下载测试内容 {i}：这是用于测试并发下载的文件内容。" * 20
-            for i in range(self.num_clients)
-        ]
-        
-        threads = []
-        
-        # 创建并启动下载线程（混合文本和Markdown格式）
-        for i, (client, content) in enumerate(zip(self.clients, download_contents)):
-            format_type = 'markdown' if i % 2 == 0 else 'text'
-            thread = threading.Thread(
-                target=self.worker_download_file,
-                args=(i, client, content, format_type)
-            )
-            threads.append(thread)
-            thread.start()
-        
-        # 等待所有线程完成
-        for thread in threads:
-            thread.join(timeout=60)
+        # 在共享线程池中批量执行下载任务（混合文本和Markdown格式）并等待完成
+        self.collect_results(self.executor.map(
+            self.worker_download_file,
+            range(self.num_clients), self.clients, self.download_contents, self.download_formats,
+            timeout=60
+        ))
         
         # 验证结果
         self.assertEqual(len(self.errors), 0, f"并发下载测试出现错误: {self.errors}")
@@ -914,7 +915,7 @@ class TestConcurrentUserAccess(unittest.TestCase):
                 if convert_response.status_code != 200:
                     raise Exception(f"Format conversion failed: {convert_response.status_code}")
                 
-                convert_data = json.loads(convert_response.data)
+                convert_data = convert_response.get_json()
                 if not convert_data['success']:
                     raise Exception(f"Format conversion not successful: {convert_data}")
                 
@@ -932,21 +933,19 @@ class TestConcurrentUserAccess(unittest.TestCase):
                 if download_response.status_code != 200:
                     raise Exception(f"Download failed: {download_response.status_code}")
                 
-                with self.lock:
-                    self.results.append({
-                        'client_id': client_id,
-                        'success': True,
-                        'conversion_time': convert_data['data']['conversion_time'],
-                        'download_size': len(download_response.data)
-                    })
+                self.result_queue.put((True, {
+                    'client_id': client_id,
+                    'success': True,
+                    'conversion_time': convert_data['data']['conversion_time'],
+                    'download_size': len(download_response.data)
+                }))
                     
             except Exception as e:
-                with self.lock:
-                    self.errors.append({
-                        'client_id': client_id,
-                        'error': str(e),
-                        'operation': 'mixed'
-                    })
+                self.result_queue.put((False, {
+                    'client_id': client_id,
+                    'error': str(e),
+                    'operation': 'mixed'
+                }))
         
         threads = []
         
@@ -962,6 +961,7 @@ class TestConcurrentUserAccess(unittest.TestCase):
         # 等待所有线程完成
         for thread in threads:
             thread.join(timeout=90)  # 混合操作需要更长时间
+        self.drain_result_queue()
         
         # 验证结果
         self.assertEqual(len(self.errors), 0, f"并发混合操作测试出现错误: {self.errors}")
@@ -979,7 +979,7 @@ class TestConcurrentUserAccess(unittest.TestCase):
         stress_clients = [self.app.test_client() for _ in range(20)]
         stress_results = []
         stress_errors = []
-        stress_lock = threading.Lock()
+        stress_queue = queue.SimpleQueue()
         
         def stress_worker(client_id, client):
             """压力测试工作线程"""
@@ -1002,20 +1002,18 @@ class TestConcurrentUserAccess(unittest.TestCase):
                     )
                     
                     if response.status_code == 200:
-                        data = json.loads(response.data)
-                        with stress_lock:
-                            stress_results.append({
-                                'client_id': client_id,
-                                'operation': operation,
-                                'success': data['success']
-                            })
+                        data = response.get_json()
+                        stress_queue.put((True, {
+                            'client_id': client_id,
+                            'operation': operation,
+                            'success': data['success']
+                        }))
                     else:
-                        with stress_lock:
-                            stress_errors.append({
-                                'client_id': client_id,
-                                'operation': operation,
-                                'status_code': response.status_code
-                            })
+                        stress_queue.put((False, {
+                            'client_id': client_id,
+                            'operation': operation,
+                            'status_code': response.status_code
+                        }))
                 
                 elif operation == 'download':
                     content = f"下载内容 {client_id}"
@@ -1028,26 +1026,24 @@ class TestConcurrentUserAccess(unittest.TestCase):
                         content_type='application/json'
                     )
                     
-                    with stress_lock:
-                        if response.status_code == 200:
-                            stress_results.append({
-                                'client_id': client_id,
-                                'operation': operation,
-                                'success': True
-                            })
-                        else:
-                            stress_errors.append({
-                                'client_id': client_id,
-                                'operation': operation,
-                                'status_code': response.status_code
-                            })
+                    if response.status_code == 200:
+                        stress_queue.put((True, {
+                            'client_id': client_id,
+                            'operation': operation,
+                            'success': True
+                        }))
+                    else:
+                        stress_queue.put((False, {
+                            'client_id': client_id,
+                            'operation': operation,
+                            'status_code': response.status_code
+                        }))
                             
             except Exception as e:
-                with stress_lock:
-                    stress_errors.append({
-                        'client_id': client_id,
-                        'error': str(e)
-                    })
+                stress_queue.put((False, {
+                    'client_id': client_id,
+                    'error': str(e)
+                }))
         
         # 使用线程池执行压力测试
         with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
@@ -1059,6 +1055,10 @@ class TestConcurrentUserAccess(unittest.TestCase):
             # 等待所有任务完成
             concurrent.futures.wait(futures, timeout=120)
         
+        while not stress_queue.empty():
+            ok, info = stress_queue.get()
+            (stress_results if ok else stress_errors).append(info)
+        
         # 验证压力测试结果
         total_operations = len(stress_results) + len(stress_errors)
         success_rate = len(stress_results) / total_operations if total_operations > 0 else 0
@@ -1074,16 +1074,19 @@ class TestConcurrentUserAccess(unittest.TestCase):
 class TestSystemIntegrationAndPerformance(unittest.TestCase):
     """系统集成和性能测试 - Requirements 1.1, 1.2, 2.1, 2.2"""
     
-    def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app_context = self.app.app_context()
-        self.app_context.push()
-        self.client = self.app.test_client()
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（应用、上下文和测试客户端在类内所有测试间共享）"""
+        cls.app = create_app()
+        cls.app.config['TESTING'] = True
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """清理测试环境"""
-        self.app_context.pop()
+        cls.app_context.pop()
     
     def test_system_health_and_status(self):
         """测试系统健康状态和状态信息"""
@@ -1091,7 +1094,7 @@ class TestSystemIntegrationAndPerformance(unittest.TestCase):
         health_response = self.client.get('/health')
         self.assertEqual(health_response.status_code, 200)
         
-        health_data = json.loads(health_response.data)
+        health_data = health_response.get_json()
         self.assertEqual(health_data['status'], 'healthy')
         self.assertIn('version', health_data)
         
@@ -1099,7 +1102,7 @@ class TestSystemIntegrationAndPerformance(unittest.TestCase):
         status_response = self.client.get('/api/status')
         self.assertEqual(status_response.status_code, 200)
         
-        status_data = json.loads(status_response.data)
+        status_data = status_response.get_json()
         self.assertTrue(status_data['success'])
         self.assertIn('data', status_data)
     
@@ -1126,7 +1129,7 @@ class TestSystemIntegrationAndPerformance(unittest.TestCase):
         self.assertLess(response_time, 5.0, f"API响应时间过长: {response_time:.2f}秒")
         
         # 测试下载API响应时间
-        data = json.loads(response.data)
+        data = response.get_json()
         content = data['data']['converted_text']
         
         start_time = time.time()
@@ -1172,7 +1175,7 @@ class TestSystemIntegrationAndPerformance(unittest.TestCase):
             self.assertEqual(response.status_code, 200)
             
             # 文件下载
-            data = json.loads(response.data)
+            data = response.get_json()
             download_response = self.client.post(
                 '/api/download-result',
                 data=json.dumps({
@@ -1226,7 +1229,7 @@ class TestSystemIntegrationAndPerformance(unittest.TestCase):
                 )
                 
                 self.assertEqual(response.status_code, 400)
-                data = json.loads(response.data)
+                data = response.get_json()
                 
                 # 验证错误响应格式一致性
                 self.assertFalse(data['success'])
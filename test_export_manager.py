@@ -7,6 +7,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.document_processing.export_manager import ExportManager
+from core.exceptions import ValidationError
 
 
 class TestExportManager(unittest.TestCase):
@@ -34,6 +35,15 @@ class TestExportManager(unittest.TestCase):
         self.assertIsNotNone(self.export_manager.formatters)
         self.assertIn('markdown', self.export_manager.formatters)
     
+    def test_default_analyzer_shared_between_instances(self):
+        """测试多个实例共享默认分析器，但各自的格式转换器映射相互独立"""
+        other_manager = ExportManager()
+        self.assertIs(other_manager.analyzer, self.export_manager.analyzer)
+        self.assertIs(other_manager.formatters['markdown'], self.export_manager.formatters['markdown'])
+        
+        other_manager.formatters['markdown'] = None
+        self.assertIsNotNone(self.export_manager.formatters['markdown'])
+    
     def test_get_supported_formats(self):
         """测试获取支持的格式列表"""
         formats = self.export_manager.get_supported_formats()
@@ -89,6 +99,19 @@ class TestExportManager(unittest.TestCase):
         self.assertIn('conversion_time', result)
         self.assertIsInstance(result['conversion_time'], float)
     
+    def test_convert_to_text(self):
+        """测试纯文本直通接口与非规范格式名的结果一致"""
+        result = self.export_manager.convert_to_text(self.sample_text)
+        normalized = self.export_manager.convert_format(self.sample_text, " TEXT ")
+        
+        self.assertEqual(result['content'], self.sample_text)
+        self.assertEqual(result['format'], 'text')
+        self.assertFalse(result['cache_hit'])
+        self.assertEqual(set(result), set(normalized))
+        
+        with self.assertRaises(ValidationError):
+            self.export_manager.convert_to_text(123)
+    
     def test_convert_format_to_markdown(self):
         """测试转换为Markdown格式"""
         result = self.export_manager.convert_format(self.sample_text, "markdown")
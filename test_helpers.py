@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+测试辅助函数 - 供多个测试模块共享
+"""
+
+from io import BytesIO
+from PIL import Image
+
+
+def create_test_image_data():
+    """创建可被解码的测试图片字节"""
+    img = Image.new('RGB', (100, 50), color='white')
+    img_bytes = BytesIO()
+    img.save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
@@ -7,13 +7,16 @@ import unittest
 import json
 import sys
 import os
+import threading
 from unittest.mock import patch, MagicMock
 from io import BytesIO
+import numpy as np
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app
+from test_helpers import create_test_image_data
+from app import app, _BatchQueue
 
 
 class TestOCRAPIExtension(unittest.TestCase):
@@ -37,7 +40,7 @@ class TestOCRAPIExtension(unittest.TestCase):
         ]
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 发送OCR请求
@@ -82,7 +85,7 @@ class TestOCRAPIExtension(unittest.TestCase):
         ]
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 发送OCR请求
@@ -114,7 +117,7 @@ class TestOCRAPIExtension(unittest.TestCase):
         mock_ocr_service.predict.return_value = []
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 发送OCR请求
@@ -144,7 +147,7 @@ class TestOCRAPIExtension(unittest.TestCase):
         # 确保OCR服务未初始化
         with patch('app.ocr_service', None):
             # 创建测试图片文件
-            test_image_data = b'fake_image_data'
+            test_image_data = create_test_image_data()
             test_file = (BytesIO(test_image_data), 'test.jpg')
             
             # 发送OCR请求
@@ -174,6 +177,108 @@ class TestOCRAPIExtension(unittest.TestCase):
         self.assertIn('error', data)
         self.assertEqual(data['error']['message'], '没有上传文件')
     
+    @patch('app.init_ocr_async')
+    @patch('app.ocr_initializing', False)
+    @patch('app.ocr_service', None)
+    def test_init_ocr_starts_single_initialization(self, mock_init_ocr_async):
+        """测试初始化进行中时重复请求不会再次启动初始化"""
+        started = threading.Event()
+        mock_init_ocr_async.side_effect = started.set
+        
+        first = self.client.post('/api/init-ocr')
+        second = self.client.post('/api/init-ocr')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 409)
+        self.assertTrue(started.wait(5))
+        mock_init_ocr_async.assert_called_once()
+    
+    @patch('app.ocr_service')
+    def test_ocr_invalid_image_data(self, mock_ocr_service):
+        """测试上传无法解码的图片数据"""
+        test_file = (BytesIO(b'fake_image_data'), 'test.jpg')
+        
+        response = self.client.post('/api/ocr',
+                                  data={'file': test_file},
+                                  content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 400)
+        
+        data = json.loads(response.data)
+        self.assertFalse(data['success'])
+        self.assertEqual(data['error']['message'], '无法解析上传的图片')
+        mock_ocr_service.predict.assert_not_called()
+    
+    @patch('app.ocr_service')
+    def test_ocr_repeated_upload_uses_cache(self, mock_ocr_service):
+        """测试重复上传相同图片时命中OCR结果缓存"""
+        mock_ocr_service.predict.return_value = [
+            {
+                'rec_texts': ['缓存测试'],
+                'rec_scores': [0.95]
+            }
+        ]
+        
+        test_image_data = create_test_image_data()
+        responses = []
+        for _ in range(2):
+            test_file = (BytesIO(test_image_data), 'test.jpg')
+            responses.append(self.client.post('/api/ocr',
+                                              data={'file': test_file},
+                                              content_type='multipart/form-data'))
+        
+        first, second = [json.loads(response.data)['data'] for response in responses]
+        self.assertEqual(first['text_content'], '缓存测试')
+        self.assertEqual(second['text_content'], first['text_content'])
+        self.assertEqual(second['line_count'], first['line_count'])
+        self.assertEqual(second['process_time'], 0.0)
+        self.assertIn('available_formats', second)
+        mock_ocr_service.predict.assert_called_once()
+    
+    @patch('app.ocr_service')
+    def test_ocr_orientation_toggle(self, mock_ocr_service):
+        """测试orient参数控制文字方向分类，且不同设置分别缓存"""
+        mock_ocr_service.predict.return_value = [
+            {
+                'rec_texts': ['方向测试'],
+                'rec_scores': [0.95]
+            }
+        ]
+        
+        test_image_data = create_test_image_data()
+        for orient in ('0', '1'):
+            test_file = (BytesIO(test_image_data), 'test.jpg')
+            response = self.client.post('/api/ocr',
+                                      data={'file': test_file, 'orient': orient},
+                                      content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 200)
+        
+        flags = [call.kwargs['use_textline_orientation'] for call in mock_ocr_service.predict.call_args_list]
+        self.assertEqual(flags, [False, True])
+    
+    @patch('app.OCR_INPUT_FROM_FILE', True)
+    @patch('app.ocr_service')
+    def test_ocr_input_from_file_reuses_scratch_path(self, mock_ocr_service):
+        """测试按文件路径识别时同一线程复用临时文件"""
+        predicted = []
+        
+        def fake_predict(path, **kwargs):
+            with open(path, 'rb') as f:
+                predicted.append((path, f.read()))
+            return [{'rec_texts': ['路径测试'], 'rec_scores': [0.95]}]
+        
+        mock_ocr_service.predict.side_effect = fake_predict
+        
+        uploads = [create_test_image_data(), b'second_upload']
+        for data in uploads:
+            response = self.client.post('/api/ocr',
+                                      data={'file': (BytesIO(data), 'test.jpg')},
+                                      content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 200)
+        
+        self.assertEqual(predicted[0][0], predicted[1][0])
+        self.assertEqual([content for _, content in predicted], uploads)
+    
     @patch('app.ocr_service')
     def test_ocr_response_structure_completeness(self, mock_ocr_service):
         """测试OCR响应结构的完整性"""
@@ -186,7 +291,7 @@ class TestOCRAPIExtension(unittest.TestCase):
         ]
         
         # 创建测试图片文件
-        test_image_data = b'fake_image_data'
+        test_image_data = create_test_image_data()
         test_file = (BytesIO(test_image_data), 'test.jpg')
         
         # 发送OCR请求
@@ -233,6 +338,136 @@ class TestOCRAPIExtension(unittest.TestCase):
         self.assertIn('markdown', formats)
 
 
+
+class TestBatchQueue(unittest.TestCase):
+    """请求级批处理队列测试类"""
+    
+    @patch('app.ocr_service')
+    def test_concurrent_requests_are_batched(self, mock_ocr_service):
+        """测试并发请求被合并为批量predict调用且结果正确回填"""
+        mock_ocr_service.predict.side_effect = lambda imgs, **kwargs: [
+            {'rec_texts': [str(int(img[0, 0, 0]))], 'rec_scores': [0.9]}
+            for img in imgs
+        ]
+        
+        batch_queue = _BatchQueue(max_batch_size=4, max_latency_ms=200)
+        batch_queue.start()
+        self.addCleanup(batch_queue.stop)
+        self.assertTrue(batch_queue.is_running())
+        
+        results = {}
+        
+        def worker(value):
+            img = np.full((10, 10, 3), value, dtype=np.uint8)
+            results[value] = batch_queue.submit(img, timeout=10)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # 每个请求都拿到自己图片对应的结果
+        for value in range(3):
+            self.assertEqual(results[value][0]['rec_texts'], [str(value)])
+        
+        # 所有图片都经过批量调用，且调用次数不超过请求数
+        batched = sum(len(call.args[0]) for call in mock_ocr_service.predict.call_args_list)
+        self.assertEqual(batched, 3)
+        self.assertLessEqual(mock_ocr_service.predict.call_count, 3)
+    
+    @patch('app.ocr_service')
+    def test_requests_grouped_by_orientation_flag(self, mock_ocr_service):
+        """测试文字方向分类开关不同的请求分别调用predict"""
+        mock_ocr_service.predict.side_effect = lambda imgs, **kwargs: [
+            {'rec_texts': [str(kwargs['use_textline_orientation'])], 'rec_scores': [0.9]}
+            for img in imgs
+        ]
+        
+        batch_queue = _BatchQueue(max_batch_size=4, max_latency_ms=200)
+        batch_queue.start()
+        self.addCleanup(batch_queue.stop)
+        
+        results = {}
+        
+        def worker(orient):
+            img = np.zeros((10, 10, 3), dtype=np.uint8)
+            results[orient] = batch_queue.submit(img, orient, timeout=10)
+        
+        threads = [threading.Thread(target=worker, args=(orient,)) for orient in (True, False)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results[True][0]['rec_texts'], ['True'])
+        self.assertEqual(results[False][0]['rec_texts'], ['False'])
+    
+    @patch('app.ocr_service')
+    def test_batch_error_propagates(self, mock_ocr_service):
+        """测试批量predict失败时错误传递给等待的请求"""
+        mock_ocr_service.predict.side_effect = RuntimeError('predict failed')
+        
+        batch_queue = _BatchQueue(max_batch_size=2, max_latency_ms=1)
+        batch_queue.start()
+        self.addCleanup(batch_queue.stop)
+        
+        with self.assertRaises(RuntimeError):
+            batch_queue.submit(np.zeros((10, 10, 3), dtype=np.uint8), timeout=10)
+    
+    @patch('app.ocr_service')
+    def test_result_count_mismatch_sets_error(self, mock_ocr_service):
+        """测试批量predict返回的结果数与请求数不一致时请求收到错误"""
+        mock_ocr_service.predict.return_value = []
+        
+        batch_queue = _BatchQueue(max_batch_size=2, max_latency_ms=1)
+        batch_queue.start()
+        self.addCleanup(batch_queue.stop)
+        
+        with self.assertRaises(RuntimeError):
+            batch_queue.submit(np.zeros((10, 10, 3), dtype=np.uint8), timeout=10)
+    
+    @patch('app.ocr_service')
+    def test_release_deferred_until_batch_finishes(self, mock_ocr_service):
+        """测试等待超时的请求在批量predict结束后才释放资源"""
+        predict_started = threading.Event()
+        unblock = threading.Event()
+        
+        def slow_predict(imgs, **kwargs):
+            predict_started.set()
+            unblock.wait(10)
+            return [{'rec_texts': [], 'rec_scores': []} for img in imgs]
+        
+        mock_ocr_service.predict.side_effect = slow_predict
+        released = threading.Event()
+        release = MagicMock(side_effect=released.set)
+        
+        batch_queue = _BatchQueue(max_batch_size=2, max_latency_ms=1)
+        batch_queue.start()
+        self.addCleanup(batch_queue.stop)
+        self.addCleanup(unblock.set)
+        
+        with self.assertRaises(TimeoutError):
+            batch_queue.submit(np.zeros((10, 10, 3), dtype=np.uint8), timeout=0.2, release=release)
+        
+        # 提交方已超时返回，但predict仍在执行，资源不能被释放
+        self.assertTrue(predict_started.wait(5))
+        release.assert_not_called()
+        
+        unblock.set()
+        self.assertTrue(released.wait(5))
+        release.assert_called_once_with()
+    
+    def test_stop_terminates_thread(self):
+        """测试stop()结束后台批处理线程"""
+        batch_queue = _BatchQueue(max_batch_size=2, max_latency_ms=1)
+        batch_queue.start()
+        self.assertTrue(batch_queue.is_running())
+        
+        batch_queue.stop(timeout=5)
+        self.assertFalse(batch_queue.is_running())
+
+
 if __name__ == '__main__':
     print("运行OCR API扩展测试...")
     unittest.main(verbosity=2)
\ No newline at end of file